@@ -1,30 +1,59 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, Body, Form
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import json
+from contextlib import asynccontextmanager
 from typing import Optional, List, Dict, Union
-import sys
 import os
 import json
 import tempfile
 import datetime
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import OperationalError, ProgrammingError, IntegrityError
 
-# Add src to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
-
-from compare_docs import get_structured_diff
-from syntax_parser import parse_syntax
+from src.compare_docs import get_structured_diff, get_three_way_diff, get_series_diff
+from src.compare_docs.budget import MAX_INPUT_BYTES, content_size, input_limit
+from src.syntax_parser import parse_syntax
 from .database import get_db, User, History, hash_password, verify_password, create_tables
 
-# Create database tables
-create_tables()
-
 # Blob storage setup
 CONTENTS_DIR = "contents"
-os.makedirs(CONTENTS_DIR, exist_ok=True)
 
-app = FastAPI(title="Compare Docs API", version="1.0.0")
+# Set AUTO_CREATE_TABLES=0 when tables are managed by `python -m api.setup_db`,
+# e.g. with several workers that would otherwise all run DDL at boot.
+AUTO_CREATE_TABLES = os.getenv("AUTO_CREATE_TABLES", "1") != "0"
+
+# Default per-request compare budget (seconds); requests may ask for less, never more
+COMPARE_TIME_BUDGET = float(os.getenv("COMPARE_TIME_BUDGET", "20"))
+COMPARE_MEMORY_BUDGET = int(os.getenv("COMPARE_MEMORY_BUDGET", 512 * 1024 * 1024))
+
+# Extra named ignore masks, as JSON {"name": "regex"}. Clients pick masks by name in `ignore`;
+# they never send regexes themselves, since an untrusted pattern can backtrack for minutes.
+COMPARE_IGNORE_MASKS = json.loads(os.getenv("COMPARE_IGNORE_MASKS", "{}"))
+
+def is_concurrent_ddl_error(e):
+    """True for errors raised when another process created the same table/type first."""
+    message = str(e.orig if getattr(e, 'orig', None) is not None else e).lower()
+    return 'already exists' in message or 'duplicate key' in message
+
+def setup():
+    """Startup work: storage directory and (optionally) database tables."""
+    os.makedirs(CONTENTS_DIR, exist_ok=True)
+    if AUTO_CREATE_TABLES:
+        try:
+            create_tables()
+        except (OperationalError, ProgrammingError, IntegrityError) as e:
+            # Another worker may have created the tables concurrently; anything else
+            # (unreachable database, bad credentials) must fail startup
+            if not is_concurrent_ddl_error(e):
+                raise
+            print(f"Skipping table creation: {e}")
+
+@asynccontextmanager
+async def lifespan(app):
+    setup()
+    yield
+
+app = FastAPI(title="Compare Docs API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -154,6 +183,43 @@ def get_history(email: str, db: Session = Depends(get_db)):
         })
     return result
 
+def resolve_budgets(time_budget, memory_budget):
+    """Clamp requested budgets to the server limits; a budget that is not positive is rejected."""
+    if time_budget is not None and time_budget <= 0:
+        raise HTTPException(status_code=400, detail="time_budget must be positive")
+    if memory_budget is not None and memory_budget <= 0:
+        raise HTTPException(status_code=400, detail="memory_budget must be positive")
+    time_budget = min(time_budget, COMPARE_TIME_BUDGET) if time_budget is not None else COMPARE_TIME_BUDGET
+    memory_budget = min(memory_budget, COMPARE_MEMORY_BUDGET) if memory_budget is not None else COMPARE_MEMORY_BUDGET
+    return time_budget, memory_budget
+
+def check_input_sizes(uploads, contents, streaming=False, file_type=None):
+    """
+    Reject oversized inputs with 413. With streaming (endpoints that compare uploads by path), uploads
+    of a streaming type (file_type, else the file extension) get the larger streaming limit.
+    """
+    for upload in uploads:
+        if not upload or upload.size is None:
+            continue
+        limit = MAX_INPUT_BYTES
+        if streaming:
+            limit = input_limit('path', file_type or os.path.splitext(upload.filename or '')[1].lower()[1:])
+        if upload.size > limit:
+            raise HTTPException(status_code=413, detail=f"File too large (limit {limit} bytes)")
+    for content in contents:
+        if content and content_size(content) > MAX_INPUT_BYTES:
+            raise HTTPException(status_code=413, detail=f"Input too large (limit {MAX_INPUT_BYTES} bytes)")
+
+def save_upload(upload):
+    """
+    Write an uploaded file to a temp path and return the path (caller unlinks).
+    The path keeps the upload's extension, which is how path-mode compares pick the file type.
+    """
+    suffix = os.path.splitext(upload.filename or '')[1]
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp:
+        temp.write(upload.file.read())
+        return temp.name
+
 @app.post("/compare")
 def compare_docs_api(
     file1: Optional[UploadFile] = File(None),
@@ -162,21 +228,32 @@ def compare_docs_api(
     input2: Optional[str] = Form(None),
     input_mode: str = Form('content'),
     file_type: Optional[str] = Form(None),
-    validate_syntax: bool = Form(False)
+    validate_syntax: bool = Form(False),
+    time_budget: Optional[float] = Form(None),
+    memory_budget: Optional[int] = Form(None),
+    key_columns: Optional[str] = Form(None),
+    ignore: Optional[str] = Form(None)
 ):
+    time_budget, memory_budget = resolve_budgets(time_budget, memory_budget)
+    check_input_sizes([file1, file2], [input1, input2], streaming=True, file_type=file_type)
+    # Comma-separated key column names for csv/tsv compares
+    key_columns = [k.strip() for k in key_columns.split(',') if k.strip()] if key_columns else None
+    # Comma-separated ignore rules, e.g. "line_endings,case,timestamps"; names from COMPARE_IGNORE_MASKS
+    # select the server's own patterns
+    ignore = [r.strip() for r in ignore.split(',') if r.strip()] if ignore else []
+    ignore_patterns = [COMPARE_IGNORE_MASKS[r] for r in ignore if r in COMPARE_IGNORE_MASKS]
+    ignore = [r for r in ignore if r not in COMPARE_IGNORE_MASKS]
     try:
         content1 = None
         content2 = None
         if file1 and file2:
-            # Save uploaded files to temp
-            with tempfile.NamedTemporaryFile(delete=False) as temp1:
-                temp1.write(file1.file.read())
-                temp1_path = temp1.name
-            with tempfile.NamedTemporaryFile(delete=False) as temp2:
-                temp2.write(file2.file.read())
-                temp2_path = temp2.name
+            # Save uploaded files to temp (keeping the extension, which picks the streaming limit and engine)
+            temp1_path = save_upload(file1)
+            temp2_path = save_upload(file2)
             try:
-                result = get_structured_diff(temp1_path, temp2_path, input_mode='path', file_type=file_type)
+                result = get_structured_diff(temp1_path, temp2_path, input_mode='path', file_type=file_type,
+                                             time_budget=time_budget, memory_budget=memory_budget,
+                                             key_columns=key_columns, ignore=ignore, ignore_patterns=ignore_patterns)
             finally:
                 os.unlink(temp1_path)
                 os.unlink(temp2_path)
@@ -185,7 +262,9 @@ def compare_docs_api(
                 input1 = json.dumps(input1)
             if isinstance(input2, dict):
                 input2 = json.dumps(input2)
-            result = get_structured_diff(input1, input2, input_mode=input_mode, file_type=file_type)
+            result = get_structured_diff(input1, input2, input_mode=input_mode, file_type=file_type,
+                                         time_budget=time_budget, memory_budget=memory_budget,
+                                         key_columns=key_columns, ignore=ignore, ignore_patterns=ignore_patterns)
         else:
             raise HTTPException(status_code=400, detail="Provide either files or content")
         
@@ -206,6 +285,64 @@ def compare_docs_api(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/compare3")
+def compare3_docs_api(
+    base_file: Optional[UploadFile] = File(None),
+    left_file: Optional[UploadFile] = File(None),
+    right_file: Optional[UploadFile] = File(None),
+    base: Optional[str] = Form(None),
+    left: Optional[str] = Form(None),
+    right: Optional[str] = Form(None),
+    file_type: Optional[str] = Form(None),
+    time_budget: Optional[float] = Form(None),
+    memory_budget: Optional[int] = Form(None)
+):
+    """Three-way compare: how left and right diverged from a common base."""
+    time_budget, memory_budget = resolve_budgets(time_budget, memory_budget)
+    check_input_sizes([base_file, left_file, right_file], [base, left, right])
+    if base_file and left_file and right_file:
+        paths = [save_upload(f) for f in (base_file, left_file, right_file)]
+        try:
+            return get_three_way_diff(*paths, input_mode='path', file_type=file_type,
+                                      time_budget=time_budget, memory_budget=memory_budget)
+        finally:
+            for path in paths:
+                os.unlink(path)
+    if base is not None and left is not None and right is not None:
+        # Form fields are always content; server paths are only used for our own temp uploads
+        return get_three_way_diff(base, left, right, input_mode='content', file_type=file_type,
+                                  time_budget=time_budget, memory_budget=memory_budget)
+    raise HTTPException(status_code=400, detail="Provide base, left and right as files or content")
+
+@app.post("/compare-series")
+def compare_series_api(
+    files: Optional[List[UploadFile]] = File(None),
+    inputs: Optional[List[str]] = Form(None),
+    labels: Optional[List[str]] = Form(None),
+    file_type: Optional[str] = Form(None),
+    time_budget: Optional[float] = Form(None),
+    memory_budget: Optional[int] = Form(None)
+):
+    """Compare N ordered revisions: consecutive diffs plus per-line introduced/removed blame."""
+    time_budget, memory_budget = resolve_budgets(time_budget, memory_budget)
+    check_input_sizes(files or [], inputs or [])
+    if labels and len(labels) != len(files or inputs or []):
+        raise HTTPException(status_code=400, detail="labels must match the number of inputs")
+    if files and len(files) >= 2:
+        paths = [save_upload(f) for f in files]
+        try:
+            return get_series_diff(paths, input_mode='path', file_type=file_type,
+                                   labels=labels or [f.filename for f in files],
+                                   time_budget=time_budget, memory_budget=memory_budget)
+        finally:
+            for path in paths:
+                os.unlink(path)
+    if inputs and len(inputs) >= 2:
+        # Form fields are always content; server paths are only used for our own temp uploads
+        return get_series_diff(inputs, input_mode='content', file_type=file_type, labels=labels,
+                               time_budget=time_budget, memory_budget=memory_budget)
+    raise HTTPException(status_code=400, detail="Provide at least two files or inputs")
+
 @app.post("/extract-docx-text")
 def extract_docx_text(file: UploadFile = File(...)):
     try:
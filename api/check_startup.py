@@ -0,0 +1,103 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+# Own import time budget per module, in milliseconds: the module's cumulative import time
+# minus the third-party packages it pulls in (SQLAlchemy, FastAPI, pydantic), which we cannot
+# make faster and which dominate the total (~0.9 s of database, ~2 s of app). Budgets are
+# about 1.5-2x the best-of-3 own times on a dev container (compare_docs 65-95, syntax_parser
+# ~20, database ~15, app 130-180) and well under the old eager cumulative times.
+# Eager heavy dependencies are caught by LAZY_MODULES below.
+# Scale all budgets with IMPORT_BUDGET_SCALE on slow CI machines (e.g. IMPORT_BUDGET_SCALE=2).
+IMPORT_BUDGETS_MS = {
+    "src.compare_docs": 140,
+    "src.syntax_parser": 40,
+    "api.database": 40,
+    "api.app": 300,
+}
+
+# Top-level packages that count as our own code
+PROJECT_PACKAGES = {"src", "api"}
+
+# Heavy dependencies that must only be imported on first use
+LAZY_MODULES = ["docx", "lxml", "passlib", "pyflakes", "yaml"]
+
+# Files/directories that importing the app must not create
+SIDE_EFFECT_PATHS = ["compare_docs.db", "contents"]
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+def own_time_us(entries, module):
+    """
+    Cumulative import time of module minus the third-party packages imported beneath it.
+    entries are (name, indent, cumulative us) in -X importtime order, where every import is
+    printed after the (more indented) imports it triggered.
+    """
+    for k, (name, indent, cumulative) in enumerate(entries):
+        if name == module:
+            break
+    else:
+        return 0
+    deps = 0
+    dep_indent = None
+    # Walking backwards visits each import before the imports it triggered
+    for name, child_indent, child_cumulative in reversed(entries[:k]):
+        if child_indent <= indent:
+            break
+        if dep_indent is not None and child_indent > dep_indent:
+            continue
+        dep_indent = None
+        top = name.split(".")[0]
+        if top not in PROJECT_PACKAGES and top not in sys.stdlib_module_names:
+            deps += child_cumulative
+            dep_indent = child_indent
+    return cumulative - deps
+
+def measure_import(module, cwd):
+    """Import module in a fresh interpreter; return (own ms, set of loaded top-level modules)."""
+    code = f"import sys, {module}; print(','.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=cwd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+    entries = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package (indented by nesting)
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2]
+        entries.append((name.strip(), len(name) - len(name.lstrip()), int(parts[1])))
+    return own_time_us(entries, module) / 1000, set(proc.stdout.strip().split(","))
+
+def check():
+    scale = float(os.getenv("IMPORT_BUDGET_SCALE", "1"))
+    failures = []
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        with tempfile.TemporaryDirectory() as cwd:
+            # Best of 3 to smooth out noise from cold filesystem caches
+            runs = [measure_import(module, cwd) for _ in range(3)]
+            elapsed = min(ms for ms, _ in runs)
+            loaded = runs[0][1]
+            created = [p for p in SIDE_EFFECT_PATHS if os.path.exists(os.path.join(cwd, p))]
+        limit = budget * scale
+        status = "ok" if elapsed <= limit else "OVER BUDGET"
+        print(f"{module:<20} {elapsed:8.1f} ms  (budget {limit:.0f} ms)  {status}")
+        if elapsed > limit:
+            failures.append(f"{module} took {elapsed:.1f} ms, budget {limit:.0f} ms")
+        eager = [m for m in LAZY_MODULES if m in loaded]
+        if eager:
+            failures.append(f"{module} eagerly imports {', '.join(eager)}")
+        if created:
+            failures.append(f"{module} created {', '.join(created)} at import")
+    return failures
+
+if __name__ == "__main__":
+    failures = check()
+    for f in failures:
+        print(f"FAIL: {f}")
+    sys.exit(1 if failures else 0)
@@ -3,19 +3,32 @@ from sqlalchemy import JSON
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 import os
-from passlib.context import CryptContext
 import datetime
 
 # Database URL - for local dev, use env var or default
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./compare_docs.db")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Engine and password context are created on first use so importing this module stays cheap
+engine = None
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+_pwd_context = None
+
+def get_engine():
+    global engine
+    if engine is None:
+        engine = create_engine(DATABASE_URL)
+        SessionLocal.configure(bind=engine)
+    return engine
+
+def get_pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+    return _pwd_context
 
 class User(Base):
     __tablename__ = "users"
@@ -43,10 +56,11 @@ class History(Base):
 
 # Create tables
 def create_tables():
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
 
 # Dependency to get DB session
 def get_db():
+    get_engine()
     db = SessionLocal()
     try:
         yield db
@@ -55,7 +69,7 @@ def get_db():
 
 # Password utilities
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return get_pwd_context().verify(plain_password, hashed_password)
\ No newline at end of file
@@ -0,0 +1,309 @@
+"""
+HTTP load test for the API.
+
+Replays a request corpus (recorded JSONL, or a synthetic mix of /compare, /get-history and
+/save-history) at a target rate and reports latency percentiles, error rate and throughput
+per endpoint. By default the app is served in-process by uvicorn against a throwaway SQLite
+database, so no network or PostgreSQL is needed:
+
+    python -m api.load_test --rps 20 --duration 30
+    python -m api.load_test --url http://localhost:8000 --corpus corpus.jsonl
+    python -m api.load_test --record corpus.jsonl --requests 500     # write a synthetic corpus
+    python -m api.load_test --baseline loadtest-results/previous.json
+
+Corpus lines look like {"method": "POST", "path": "/compare", "form": {...}};
+"json" (request body) and "params" (query string) are also accepted.
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Relative weights of the synthetic request mix
+DEFAULT_MIX = {"/compare": 6, "/get-history": 3, "/save-history": 1}
+
+# Account used by the history endpoints; registered before the run
+LOAD_USER = {"name": "Load Test", "email": "loadtest@example.com", "password": "loadtest"}
+
+RESULTS_DIR = "loadtest-results"
+
+def _fixtures():
+    """Small real inputs from tests/ (the .txt and .json fixtures), grouped by extension."""
+    fixtures = {}
+    paths = glob.glob(os.path.join(ROOT, "tests", "*.txt")) + glob.glob(os.path.join(ROOT, "tests", "*.json"))
+    for path in sorted(paths):
+        with open(path, "r", encoding="utf-8") as f:
+            fixtures.setdefault(os.path.splitext(path)[1], []).append(f.read())
+    return fixtures
+
+def _document(rng, lines):
+    return "".join(f"Line {i}: {rng.choice(['alpha', 'beta', 'gamma', 'delta'])} {rng.randrange(1000)}\n"
+                   for i in range(lines))
+
+def _edit(rng, text, edits):
+    lines = text.splitlines(True)
+    for _ in range(edits):
+        k = rng.randrange(len(lines))
+        lines[k] = lines[k].upper() if rng.random() < 0.5 else "Inserted line\n" + lines[k]
+    return "".join(lines)
+
+def _compare_request(rng, fixtures):
+    kind = rng.random()
+    if kind < 0.3 and fixtures.get(".json"):
+        input1 = rng.choice(fixtures[".json"])
+        input2 = rng.choice(fixtures[".json"])
+        form = {"input1": input1, "input2": input2, "file_type": "json"}
+    elif kind < 0.5 and fixtures.get(".txt"):
+        form = {"input1": rng.choice(fixtures[".txt"]), "input2": rng.choice(fixtures[".txt"])}
+    else:
+        # Mid-sized text with a handful of edits
+        text = _document(rng, rng.choice([100, 500, 2000]))
+        form = {"input1": text, "input2": _edit(rng, text, rng.randrange(1, 20))}
+    return {"method": "POST", "path": "/compare", "form": form}
+
+def _save_history_request(rng):
+    text = _document(rng, rng.choice([10, 100]))
+    history = {
+        "leftContent": text,
+        "rightContent": _edit(rng, text, 2),
+        "result": {"identical": False, "diffs": [], "warnings": []},
+        "timestamp": datetime.datetime.utcnow().isoformat(),
+    }
+    return {"method": "POST", "path": "/save-history", "json": {"email": LOAD_USER["email"], "history": history}}
+
+def synthetic_corpus(count, mix=None, seed=0):
+    """Build count requests drawn from the endpoint mix (deterministic for a given seed)."""
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    paths = list(mix)
+    weights = [mix[p] for p in paths]
+    fixtures = _fixtures()
+    corpus = []
+    for _ in range(count):
+        path = rng.choices(paths, weights)[0]
+        if path == "/compare":
+            corpus.append(_compare_request(rng, fixtures))
+        elif path == "/save-history":
+            corpus.append(_save_history_request(rng))
+        elif path == "/get-history":
+            corpus.append({"method": "GET", "path": "/get-history", "params": {"email": LOAD_USER["email"]}})
+        else:
+            raise ValueError(f"No synthetic requests for {path}")
+    return corpus
+
+def load_corpus(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def save_corpus(path, corpus):
+    with open(path, "w", encoding="utf-8") as f:
+        for req in corpus:
+            f.write(json.dumps(req) + "\n")
+
+def parse_mix(text):
+    """'compare=6,get-history=3' -> {'/compare': 6, '/get-history': 3}"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix["/" + name.strip().lstrip("/")] = float(weight or 1)
+    return mix
+
+def build_request(base_url, req):
+    url = base_url + req["path"]
+    if req.get("params"):
+        url += "?" + urllib.parse.urlencode(req["params"])
+    data = None
+    headers = {}
+    if "json" in req:
+        data = json.dumps(req["json"]).encode("utf-8")
+        headers["Content-Type"] = "application/json"
+    elif "form" in req:
+        data = urllib.parse.urlencode(req["form"]).encode("utf-8")
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+    return urllib.request.Request(url, data=data, headers=headers, method=req.get("method", "GET"))
+
+def send(base_url, req, timeout):
+    """Send one request; returns the HTTP status (0 when no response was received)."""
+    try:
+        with urllib.request.urlopen(build_request(base_url, req), timeout=timeout) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+def start_server(workdir):
+    """
+    Serve api.app in a background thread on a free local port, with the SQLite database and
+    history contents kept in workdir. Returns (base_url, server, thread).
+    """
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'loadtest.db')}"
+    os.chdir(workdir)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import uvicorn
+    from api.app import app
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 30
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("In-process server did not start")
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server, thread
+
+def ensure_user(base_url, timeout):
+    status = send(base_url, {"method": "POST", "path": "/register", "json": LOAD_USER}, timeout)
+    # 400 means the user is already there from an earlier run
+    if status not in (200, 400):
+        raise RuntimeError(f"Could not register load-test user (HTTP {status})")
+
+def run(base_url, corpus, rps, duration, concurrency, timeout):
+    """
+    Open-loop replay: request i is due at start + i / rps, whatever happened to earlier ones.
+    Latency runs from the due time, so time spent queued behind a slow server is counted
+    (no coordinated omission). Returns (samples as (path, status, seconds), elapsed seconds).
+    """
+    total = max(1, int(rps * duration))
+    samples = []
+    lock = threading.Lock()
+
+    def fire(req, due):
+        status = send(base_url, req, timeout)
+        latency = time.monotonic() - due
+        with lock:
+            samples.append((req["path"], status, latency))
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(total):
+            due = start + i / rps
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, corpus[i % len(corpus)], due)
+    return samples, time.monotonic() - start
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+def summarize(samples, elapsed):
+    groups = {}
+    for path, status, latency in samples:
+        groups.setdefault(path, []).append((status, latency))
+    groups["all"] = [(status, latency) for _, status, latency in samples]
+    summary = {}
+    for path, rows in groups.items():
+        latencies = sorted(latency for _, latency in rows)
+        errors = sum(1 for status, _ in rows if not 200 <= status < 400)
+        summary[path] = {
+            "requests": len(rows),
+            "errors": errors,
+            "error_rate": errors / len(rows),
+            "throughput_rps": (len(rows) - errors) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+        }
+    return summary
+
+def _delta(now, before):
+    if not before:
+        return ""
+    return f" ({(now - before) / before * 100:+.0f}%)"
+
+def report(summary, baseline=None):
+    baseline = baseline or {}
+    print(f"{'endpoint':<16} {'reqs':>6} {'err%':>6} {'rps':>14} {'p50 ms':>16} {'p95 ms':>16} {'p99 ms':>16}")
+    for path, row in summary.items():
+        old = baseline.get(path, {})
+        cells = [f"{row['throughput_rps']:.1f}{_delta(row['throughput_rps'], old.get('throughput_rps'))}"]
+        cells += [f"{row[k]:.1f}{_delta(row[k], old.get(k))}" for k in ("p50_ms", "p95_ms", "p99_ms")]
+        print(f"{path:<16} {row['requests']:>6} {row['error_rate'] * 100:>5.1f}% {cells[0]:>14} "
+              f"{cells[1]:>16} {cells[2]:>16} {cells[3]:>16}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the compare-docs API.")
+    parser.add_argument("--url", help="Base URL of a running server (default: serve in-process on SQLite)")
+    parser.add_argument("--corpus", help="JSONL request corpus to replay (default: synthetic mix)")
+    parser.add_argument("--record", help="Write the synthetic corpus to this JSONL file and exit")
+    parser.add_argument("--requests", type=int, default=200, help="Synthetic corpus size")
+    parser.add_argument("--mix", help="Synthetic mix, e.g. compare=6,get-history=3,save-history=1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rps", type=float, default=20.0, help="Target request rate")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--concurrency", type=int, default=32, help="Maximum requests in flight")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--out", help=f"Results file (default: {RESULTS_DIR}/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix) if args.mix else None
+    if args.record:
+        save_corpus(args.record, synthetic_corpus(args.requests, mix, args.seed))
+        print(f"Wrote {args.requests} requests to {args.record}")
+        return 0
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.requests, mix, args.seed)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["summary"]
+    out = os.path.abspath(args.out or os.path.join(
+        RESULTS_DIR, datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + ".json"))
+
+    server = thread = None
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        try:
+            if args.url:
+                base_url = args.url.rstrip("/")
+            else:
+                base_url, server, thread = start_server(workdir)
+            ensure_user(base_url, args.timeout)
+            samples, elapsed = run(base_url, corpus, args.rps, args.duration, args.concurrency, args.timeout)
+        finally:
+            if server is not None:
+                server.should_exit = True
+                thread.join(timeout=10)
+            os.chdir(cwd)
+
+    summary = summarize(samples, elapsed)
+    report(summary, baseline)
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({
+            "started": datetime.datetime.now().isoformat(timespec="seconds"),
+            "target": args.url or "in-process",
+            "rps": args.rps, "duration": args.duration, "concurrency": args.concurrency,
+            "corpus": args.corpus or f"synthetic({args.requests}, seed={args.seed})",
+            "elapsed": elapsed,
+            "summary": summary,
+        }, f, indent=2)
+    print(f"Results saved to {out}")
+    return 1 if summary["all"]["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,3 @@
-from .core import get_structured_diff, compare_files
\ No newline at end of file
+from .core import get_structured_diff, compare_files
+from .three_way import get_three_way_diff
+from .series import get_series_diff
\ No newline at end of file
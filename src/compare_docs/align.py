@@ -0,0 +1,126 @@
+import bisect
+import random
+import zlib
+
+NUM_HASHES = 16
+BAND_ROWS = 2
+MIN_SIMILARITY = 0.25
+BUCKET_WINDOW = 4
+# Lines processed between time budget checks
+BUDGET_CHECK_EVERY = 256
+
+_rng = random.Random(0x5eed)
+_SALTS = [_rng.getrandbits(32) for _ in range(NUM_HASHES)]
+
+def _shingles(text):
+    """Character bigrams of the stripped line, with start/end markers so short lines still overlap."""
+    s = f'\x02{text}\x03'
+    return {s[k:k + 2] for k in range(len(s) - 1)}
+
+def minhash_signature(shingles):
+    hashed = [zlib.crc32(g.encode()) for g in shingles]
+    return tuple(min(map(salt.__xor__, hashed)) for salt in _SALTS)
+
+def _bands(signature):
+    for start in range(0, NUM_HASHES, BAND_ROWS):
+        yield start, signature[start:start + BAND_ROWS]
+
+def _out_of_time(budget, count):
+    return budget is not None and count % BUDGET_CHECK_EVERY == 0 and budget.expired()
+
+def _candidate_pairs(left, right, budget=None):
+    """
+    Yield (score, i, j) for line pairs that look similar.
+    Exact matches (ignoring surrounding whitespace) come from a dict; the rest from MinHash LSH
+    buckets, so only lines sharing a band are ever looked at. Within a crowded bucket only the
+    lines nearest the expected position are considered, which keeps templated text linear.
+    MinHash only proposes candidates: each one is scored by the exact bigram Jaccard similarity.
+    Stops early once the budget has expired.
+    """
+    exact = {}
+    for j, text in enumerate(right):
+        exact.setdefault(text, []).append(j)
+    buckets = {}
+    shingles2 = [_shingles(text) for text in right]
+    for j, shingles in enumerate(shingles2):
+        if _out_of_time(budget, j):
+            return
+        for band in _bands(minhash_signature(shingles)):
+            buckets.setdefault(band, []).append(j)
+    scale = len(right) / len(left)
+    for i, text in enumerate(left):
+        if _out_of_time(budget, i):
+            return
+        expected = int(i * scale)
+        same = exact.get(text)
+        if same:
+            pos = bisect.bisect_left(same, expected)
+            for j in same[max(0, pos - BUCKET_WINDOW):pos + BUCKET_WINDOW]:
+                yield 1.0, i, j
+            continue
+        shingles = _shingles(text)
+        seen = set()
+        for band in _bands(minhash_signature(shingles)):
+            bucket = buckets.get(band)
+            if not bucket:
+                continue
+            pos = bisect.bisect_left(bucket, expected)
+            for j in bucket[max(0, pos - BUCKET_WINDOW):pos + BUCKET_WINDOW]:
+                if j in seen:
+                    continue
+                seen.add(j)
+                other = shingles2[j]
+                common = len(shingles & other)
+                score = common / (len(shingles) + len(other) - common)
+                if score >= MIN_SIMILARITY:
+                    yield score, i, j
+
+def _positional(n, m):
+    return [(k, k) for k in range(min(n, m))] + [(k, None) for k in range(m, n)] + [(None, k) for k in range(n, m)]
+
+def align_lines(left, right, budget=None):
+    """
+    Align two lists of lines from a replace block by similarity instead of position.
+    Candidate pairs are accepted best-first as long as they keep both sides in order; equal
+    scores prefer the pair closest to the block diagonal.
+    A single unmatched line left between two accepted pairs on each side is still paired.
+    If the budget runs out, lines are paired by position instead.
+    Returns an ordered list of (i, j) where either index may be None for a delete/insert.
+    """
+    if budget is not None and budget.expired():
+        budget.degrade("time budget exceeded; changed lines paired by position")
+        return _positional(len(left), len(right))
+    left_keys = [l.strip() for l in left]
+    right_keys = [l.strip() for l in right]
+    scale = len(right) / len(left)
+    candidates = list(_candidate_pairs(left_keys, right_keys, budget))
+    if budget is not None and budget.expired():
+        budget.degrade("time budget exceeded; changed lines paired by position")
+        return _positional(len(left), len(right))
+    candidates.sort(key=lambda c: (-c[0], abs(c[2] - c[1] * scale), c[1]))
+    lefts, rights = [], []
+    for _, i, j in candidates:
+        pos = bisect.bisect_left(lefts, i)
+        if pos < len(lefts) and lefts[pos] == i:
+            continue
+        if pos > 0 and rights[pos - 1] >= j:
+            continue
+        if pos < len(rights) and rights[pos] <= j:
+            continue
+        lefts.insert(pos, i)
+        rights.insert(pos, j)
+
+    result = []
+    prev_i, prev_j = -1, -1
+    for i, j in zip(lefts + [len(left)], rights + [len(right)]):
+        gap_left = range(prev_i + 1, i)
+        gap_right = range(prev_j + 1, j)
+        if len(gap_left) == 1 and len(gap_right) == 1:
+            result.append((gap_left[0], gap_right[0]))
+        else:
+            result.extend((k, None) for k in gap_left)
+            result.extend((None, k) for k in gap_right)
+        if i < len(left):
+            result.append((i, j))
+        prev_i, prev_j = i, j
+    return result
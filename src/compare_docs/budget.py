@@ -0,0 +1,228 @@
+import os
+import time
+import difflib
+
+# Hard limit on each input, checked before any parsing or diffing
+MAX_INPUT_BYTES = int(os.getenv("COMPARE_MAX_INPUT_BYTES", 50 * 1024 * 1024))
+# Files the streaming engines read incrementally (CSV/TSV hash join, XML pull parser) get a larger limit
+MAX_STREAM_INPUT_BYTES = int(os.getenv("COMPARE_MAX_STREAM_INPUT_BYTES", 2 * 1024 * 1024 * 1024))
+STREAMING_TYPES = ('csv', 'tsv', 'xml')
+# Rough working-set cost of one line in SequenceMatcher (b2j entry, list slot, hash)
+LINE_OVERHEAD_BYTES = 200
+# Changed middles at least this many lines long are matched in a process pool
+PARALLEL_MIN_LINES = int(os.getenv("COMPARE_PARALLEL_MIN_LINES", 50000))
+# Upper bound on pool size (also capped by the CPU count and the memory budget); 1 disables the pool
+PARALLEL_WORKERS = int(os.getenv("COMPARE_PARALLEL_WORKERS", 32))
+# Regions larger than 1/(workers * SEGMENTS_PER_WORKER) of the input are split before being searched
+SEGMENTS_PER_WORKER = 4
+
+class InputTooLarge(ValueError):
+    pass
+
+def estimate_bytes(lines1, lines2):
+    """Rough working set of one SequenceMatcher over these lines."""
+    # Interned (int) keys carry no text of their own
+    estimate = sum(len(l) for l in lines1 if isinstance(l, str)) + sum(len(l) for l in lines2 if isinstance(l, str))
+    return estimate + (len(lines1) + len(lines2)) * LINE_OVERHEAD_BYTES
+
+def process_pool(workers, **kwargs):
+    """
+    Process pool for large diffs. The API runs in a threaded server, where fork can
+    deadlock (Python 3.12 warns about it), so workers come from a forkserver (or spawn).
+    multiprocessing is imported here so importing the package stays cheap.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context, **kwargs)
+
+class Budget:
+    """
+    Time/memory budget for one compare.
+    Engines poll expired() between units of work and call degrade() when they fall back
+    to a coarser result; the compare result is then marked truncated.
+    """
+    def __init__(self, time_budget=None, memory_budget=None):
+        self.deadline = time.monotonic() + time_budget if time_budget else None
+        self.memory_budget = memory_budget
+        self.truncated = False
+        self.reasons = []
+
+    def expired(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def fits(self, lines1, lines2, copies=1):
+        """Estimate whether copies line diffs of these inputs (one per process) fit in the memory budget."""
+        if not self.memory_budget:
+            return True
+        return estimate_bytes(lines1, lines2) * copies <= self.memory_budget
+
+    def max_copies(self, lines1, lines2):
+        """How many processes can each hold a line diff of these inputs within the memory budget."""
+        if not self.memory_budget:
+            return None
+        return self.memory_budget // max(estimate_bytes(lines1, lines2), 1)
+
+    def degrade(self, reason):
+        self.truncated = True
+        if reason not in self.reasons:
+            self.reasons.append(reason)
+
+def content_size(data, limit=None):
+    """UTF-8 size in bytes of a content string, encoding only when the character count is inconclusive."""
+    limit = limit or MAX_INPUT_BYTES
+    if isinstance(data, bytes) or len(data) > limit or len(data) * 4 <= limit:
+        # At least one byte per character, at most four
+        return len(data)
+    return len(data.encode('utf-8'))
+
+def input_limit(input_mode, file_type):
+    """Size limit per input: files of a streaming type may be larger than content held in memory."""
+    if input_mode == 'path' and file_type in STREAMING_TYPES:
+        return MAX_STREAM_INPUT_BYTES
+    return MAX_INPUT_BYTES
+
+def check_input_size(*inputs, input_mode='content', limit=None):
+    """Raise InputTooLarge if any input (content string or file path) exceeds limit (default MAX_INPUT_BYTES)."""
+    limit = limit or MAX_INPUT_BYTES
+    for data in inputs:
+        size = os.path.getsize(data) if input_mode == 'path' else content_size(data, limit)
+        if size > limit:
+            raise InputTooLarge(f"Input too large: {size} bytes (limit {limit})")
+
+def _search(matcher, queue, budget, steps=None):
+    """
+    The recursive longest-match search of SequenceMatcher.get_matching_blocks, run off an
+    explicit queue of (alo, ahi, blo, bhi) regions. Polls the budget between find_longest_match
+    calls; regions left in the queue when time runs out stay unmatched. With steps, stops after
+    that many find_longest_match calls. Returns the blocks found; the queue is left holding the
+    regions not yet searched.
+    """
+    blocks = []
+    while queue:
+        if budget is not None and budget.expired():
+            budget.degrade("time budget exceeded during line matching")
+            break
+        if steps is not None:
+            if steps == 0:
+                break
+            steps -= 1
+        alo, ahi, blo, bhi = queue.pop()
+        i, j, k = x = matcher.find_longest_match(alo, ahi, blo, bhi)
+        if k:
+            blocks.append(tuple(x))
+            if alo < i and blo < j:
+                queue.append((alo, i, blo, j))
+            if i + k < ahi and j + k < bhi:
+                queue.append((i + k, ahi, j + k, bhi))
+    return blocks
+
+def _collapse(blocks, la, lb):
+    blocks.sort()
+    # Collapse adjacent blocks, as difflib does
+    i1 = j1 = k1 = 0
+    collapsed = []
+    for i2, j2, k2 in blocks:
+        if i1 + k1 == i2 and j1 + k1 == j2:
+            k1 += k2
+        else:
+            if k1:
+                collapsed.append((i1, j1, k1))
+            i1, j1, k1 = i2, j2, k2
+    if k1:
+        collapsed.append((i1, j1, k1))
+    collapsed.append((la, lb, 0))
+    return [difflib.Match(*b) for b in collapsed]
+
+def _matching_blocks(matcher, la, lb, budget):
+    """Same result as SequenceMatcher.get_matching_blocks, but bounded by the budget."""
+    return _collapse(_search(matcher, [(0, la, 0, lb)], budget), la, lb)
+
+_worker_matcher = None
+
+def _init_worker(mid1, mid2):
+    global _worker_matcher
+    _worker_matcher = difflib.SequenceMatcher(None, mid1, mid2)
+
+def _search_job(region, time_left, split):
+    budget = Budget(time_left)
+    queue = [region]
+    blocks = _search(_worker_matcher, queue, budget, steps=1 if split else None)
+    return blocks, queue, budget.reasons
+
+def _time_left(budget):
+    if budget is None or budget.deadline is None:
+        return None
+    return max(budget.deadline - time.monotonic(), 0.001)
+
+def _parallel_matching_blocks(matcher, la, lb, budget, workers):
+    """
+    Parallel get_matching_blocks. Every longest match is an anchor that splits its region into
+    two independent regions, so regions are farmed out to a process pool: large ones are split
+    one match at a time (their halves resubmitted), small ones searched to completion. Each
+    worker builds the same matcher over the whole input (same junk/popular heuristics), so the
+    blocks, and therefore the opcodes, are identical to the sequential search.
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+    grain = (la + lb) // (workers * SEGMENTS_PER_WORKER)
+    blocks = []
+    with process_pool(workers, initializer=_init_worker, initargs=(matcher.a, matcher.b)) as pool:
+        pending = {pool.submit(_search_job, (0, la, 0, lb), _time_left(budget), True)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                found, regions, reasons = future.result()
+                blocks.extend(found)
+                if reasons or (budget is not None and budget.expired()):
+                    # Out of time: what is left stays unmatched
+                    if budget is not None:
+                        budget.degrade("time budget exceeded during line matching")
+                    continue
+                for alo, ahi, blo, bhi in regions:
+                    split = (ahi - alo) + (bhi - blo) > grain
+                    pending.add(pool.submit(_search_job, (alo, ahi, blo, bhi), _time_left(budget), split))
+    return _collapse(blocks, la, lb)
+
+def budgeted_opcodes(lines1, lines2, budget=None, parallel=True):
+    """
+    Opcodes for a line diff that respects the budget.
+    The common prefix/suffix is trimmed first; if the middle does not fit the memory
+    budget, or time runs out while matching, unmatched regions become replace blocks.
+    Large middles (PARALLEL_MIN_LINES) are matched across a process pool with identical results,
+    unless parallel is False (e.g. when already running inside a pool worker).
+    """
+    n1, n2 = len(lines1), len(lines2)
+    prefix = 0
+    while prefix < n1 and prefix < n2 and lines1[prefix] == lines2[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < n1 - prefix and suffix < n2 - prefix and lines1[n1 - 1 - suffix] == lines2[n2 - 1 - suffix]:
+        suffix += 1
+    mid1 = lines1[prefix:n1 - suffix]
+    mid2 = lines2[prefix:n2 - suffix]
+
+    opcodes = []
+    if prefix:
+        opcodes.append(('equal', 0, prefix, 0, prefix))
+    if mid1 or mid2:
+        if budget is not None and not budget.fits(mid1, mid2):
+            budget.degrade("memory budget exceeded; reporting changed region as one block")
+            tag = 'replace' if mid1 and mid2 else ('delete' if mid1 else 'insert')
+            middle = [(tag, 0, len(mid1), 0, len(mid2))]
+        else:
+            matcher = difflib.SequenceMatcher(None, mid1, mid2)
+            workers = min(PARALLEL_WORKERS, os.cpu_count() or 1)
+            if budget is not None and budget.max_copies(mid1, mid2) is not None:
+                # Every worker holds its own copy of both inputs and its own index, on top of ours
+                workers = min(workers, budget.max_copies(mid1, mid2) - 1)
+            if parallel and workers > 1 and max(len(mid1), len(mid2)) >= PARALLEL_MIN_LINES:
+                matcher.matching_blocks = _parallel_matching_blocks(matcher, len(mid1), len(mid2), budget, workers)
+            else:
+                matcher.matching_blocks = _matching_blocks(matcher, len(mid1), len(mid2), budget)
+            middle = matcher.get_opcodes()
+        for tag, i1, i2, j1, j2 in middle:
+            opcodes.append((tag, i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix))
+    if suffix:
+        opcodes.append(('equal', n1 - suffix, n1, n2 - suffix, n2))
+    return opcodes
@@ -3,8 +3,13 @@ import json
 import zipfile
 import xml.etree.ElementTree as ET
 from itertools import zip_longest
-import difflib
-from docx import Document
+from .python_diff import compare_python_sources
+from .moves import find_moved_blocks
+from .align import align_lines
+from .budget import Budget, InputTooLarge, budgeted_opcodes, check_input_size, input_limit
+from .csv_diff import compare_csv_files, compare_csv_text
+from .xml_diff import compare_xml_files, compare_xml_text
+from .normalize import build_normalizer, normalize_lines
 
 def extract_line_number(location):
     """Extract line number from location string."""
@@ -14,78 +19,189 @@ def extract_line_number(location):
             return int(part)
     return 0
 
-def compare_docx_files(path1, path2):
+def classify_line_pair(l1, l2):
+    """Classify a changed line pair. Returns (level, desc), or None if the lines are equal."""
+    l1_str = l1.rstrip('\n')
+    l2_str = l2.rstrip('\n')
+    if l1_str == l2_str:
+        return None
+    indent1 = len(l1_str) - len(l1_str.lstrip()) if l1_str else 0
+    indent2 = len(l2_str) - len(l2_str.lstrip()) if l2_str else 0
+    strip1 = l1_str.strip()
+    strip2 = l2_str.strip()
+    if strip1 == strip2:
+        if indent1 != indent2:
+            return "ERROR", f"indentation difference: {indent1} vs {indent2} spaces"
+        return "WARNING", f"whitespace/spaces difference: '{l1_str}' vs '{l2_str}'"
+    return "CRITICAL", f"content difference: '{l1_str}' vs '{l2_str}'"
+
+def block_diffs(opcodes):
+    """One record per changed block; the coarse output used once a budget has run out."""
+    diffs = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            continue
+        if tag == 'delete':
+            diffs.append({'location': f'Left Line {i1 + 1}', 'level': 'CRITICAL', 'desc': f'Extra content in file1: lines {i1 + 1}-{i2} (diff truncated)'})
+        elif tag == 'insert':
+            diffs.append({'location': f'Right Line {j1 + 1}', 'level': 'CRITICAL', 'desc': f'Extra content in file2: lines {j1 + 1}-{j2} (diff truncated)'})
+        else:
+            diffs.append({'location': f'Line {i1 + 1}', 'level': 'CRITICAL', 'desc': f'block difference: left lines {i1 + 1}-{i2} vs right lines {j1 + 1}-{j2} (diff truncated)'})
+    return diffs
+
+def diff_lines(lines1, lines2, opcodes=None, budget=None, keys=None):
+    """
+    Line-based diff shared by the text and Docx paths.
+    Blocks that moved are reported once as MOVED instead of as deletes plus inserts.
+    opcodes can be passed in when the alignment was computed on other keys (e.g. plain Docx text).
+    keys: optional (keys1, keys2) comparison keys, one per line (e.g. normalized lines); lines with
+    equal keys count as unchanged, while records still show the original lines.
+    If the budget runs out, changed regions are reported block by block instead.
+    """
+    diffs = []
+    keys1, keys2 = keys if keys is not None else (lines1, lines2)
+    if opcodes is None:
+        opcodes = budgeted_opcodes(keys1, keys2, budget)
+    if budget is not None and budget.expired():
+        budget.degrade("time budget exceeded; reporting changed blocks only")
+    if budget is not None and budget.truncated:
+        return block_diffs(opcodes)
+    moves, moved_left, moved_right = find_moved_blocks(keys1, keys2, opcodes)
+    for i1, i2, j1, j2 in moves:
+        diffs.append({'location': f'Right Line {j1 + 1}', 'level': 'WARNING',
+                      'desc': f'MOVED: left lines {i1 + 1}-{i2} moved to right lines {j1 + 1}-{j2}'})
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            continue
+        left = [idx for idx in range(i1, i2) if idx not in moved_left]
+        right = [idx for idx in range(j1, j2) if idx not in moved_right]
+        # delete/insert have one side empty; replace blocks are aligned by line similarity
+        if left and right:
+            pairs = [(None if a is None else left[a], None if b is None else right[b])
+                     for a, b in align_lines([lines1[idx] for idx in left], [lines2[idx] for idx in right], budget)]
+        else:
+            pairs = [(idx, None) for idx in left] + [(None, idx) for idx in right]
+        for idx1, idx2 in pairs:
+            if idx1 is None:
+                diffs.append({'location': f'Right Line {idx2 + 1}', 'level': 'CRITICAL', 'desc': f'Extra content in file2: {lines2[idx2].strip()}'})
+                continue
+            if idx2 is None:
+                diffs.append({'location': f'Left Line {idx1 + 1}', 'level': 'CRITICAL', 'desc': f'Extra content in file1: {lines1[idx1].strip()}'})
+                continue
+            if keys is not None and keys1[idx1] == keys2[idx2]:
+                continue
+            classified = classify_line_pair(lines1[idx1], lines2[idx2])
+            if classified is None:
+                continue
+            level, desc = classified
+            diffs.append({'location': f'Line {idx1 + 1}', 'level': level, 'desc': desc})
+    return diffs
+
+def compare_docx_files(path1, path2, budget=None):
     """
-    Compare two Docx files by extracting text and doing line-based diff for consistency with UI highlighting.
+    Compare two Docx files in two phases.
+    Phase one aligns paragraphs by plain text only. Phase two extracts run-level formatting
+    just for paragraphs whose text changed or whose formatting fingerprint differs, so
+    unchanged paragraphs never pay for style resolution.
     """
-    text1 = extract_docx_text(path1)
-    text2 = extract_docx_text(path2)
+    doc1 = load_docx(path1)
+    doc2 = load_docx(path2)
     diffs = []
-    if text1 is None or text2 is None:
+    if doc1 is None or doc2 is None:
         diffs.append({'location': 'File', 'level': 'CRITICAL', 'desc': 'Failed to extract text from Docx file'})
         return diffs
 
-    lines1 = text1 if isinstance(text1, list) else text1.splitlines(True)
-    lines2 = text2 if isinstance(text2, list) else text2.splitlines(True)
+    paras1 = docx_paragraphs(doc1)
+    paras2 = docx_paragraphs(doc2)
+    lines1 = [p.text + '\n' for p in paras1] + docx_shape_lines(doc1)
+    lines2 = [p.text + '\n' for p in paras2] + docx_shape_lines(doc2)
 
-    # Line-based compare
-    matcher = difflib.SequenceMatcher(None, lines1, lines2)
-    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+    opcodes = budgeted_opcodes(lines1, lines2, budget)
+    for tag, i1, i2, j1, j2 in opcodes:
         if tag == 'equal':
-            continue
-        elif tag == 'delete':
-            for idx in range(i1, i2):
-                lineno = idx + 1
-                diffs.append({'location': f'Left Line {lineno}', 'level': 'CRITICAL', 'desc': f'Extra content in file1: {lines1[idx].strip()}'})
-        elif tag == 'insert':
-            for idx in range(j1, j2):
-                lineno = idx + 1
-                diffs.append({'location': f'Right Line {lineno}', 'level': 'CRITICAL', 'desc': f'Extra content in file2: {lines2[idx].strip()}'})
-        elif tag == 'replace':
-            len_a = i2 - i1
-            len_b = j2 - j1
-            max_len = max(len_a, len_b)
-            for k in range(max_len):
-                l1 = lines1[i1 + k] if k < len_a else None
-                l2 = lines2[j1 + k] if k < len_b else None
-                if l1 is None:
-                    lineno = j1 + k + 1
-                    diffs.append({'location': f'Right Line {lineno}', 'level': 'CRITICAL', 'desc': f'Extra content in file2: {l2.strip()}'})
-                    continue
-                if l2 is None:
-                    lineno = i1 + k + 1
-                    diffs.append({'location': f'Left Line {lineno}', 'level': 'CRITICAL', 'desc': f'Extra content in file1: {l1.strip()}'})
+            if budget is not None and budget.expired():
+                budget.degrade("time budget exceeded; formatting checks skipped")
+                continue
+            for i, j in zip(range(i1, i2), range(j1, j2)):
+                if i >= len(paras1) or j >= len(paras2):
                     continue
-                lineno = i1 + k + 1
-                l1_str = l1.rstrip('\n')
-                l2_str = l2.rstrip('\n')
-                if l1_str == l2_str:
+                if paragraph_fingerprint(paras1[i]) == paragraph_fingerprint(paras2[j]):
                     continue
-                indent1 = len(l1_str) - len(l1_str.lstrip()) if l1_str else 0
-                indent2 = len(l2_str) - len(l2_str.lstrip()) if l2_str else 0
-                strip1 = l1_str.strip()
-                strip2 = l2_str.strip()
-                if strip1 == strip2:
-                    if indent1 != indent2:
-                        level = "ERROR"
-                        desc = f"indentation difference: {indent1} vs {indent2} spaces"
-                    else:
-                        level = "WARNING"
-                        desc = f"whitespace/spaces difference: '{l1_str}' vs '{l2_str}'"
-                else:
-                    level = "CRITICAL"
-                    desc = f"content difference: '{l1_str}' vs '{l2_str}'"
-                diffs.append({'location': f'Line {lineno}', 'level': level, 'desc': desc})
-
+                diff = compare_paragraph_formatting(paras1[i], paras2[j])
+                if diff:
+                    level, desc = diff
+                    diffs.append({'location': f'Line {i + 1}', 'level': level, 'desc': desc})
+            continue
+        # Text changed: only these paragraphs get full formatting extraction
+        for i in range(i1, min(i2, len(paras1))):
+            lines1[i] = format_paragraph(paras1[i]) + '\n'
+        for j in range(j1, min(j2, len(paras2))):
+            lines2[j] = format_paragraph(paras2[j]) + '\n'
+    diffs.extend(diff_lines(lines1, lines2, opcodes, budget))
+    diffs.sort(key=lambda d: extract_line_number(d['location']))
     return diffs
 
-def get_structured_diff(input1, input2, input_mode='path', file_type=None):
+def compare_python_text(text1, text2, warnings):
+    """
+    Structural compare for Python sources.
+    Returns a result dict, or None if either side fails to parse (caller falls back to line diff).
+    """
+    try:
+        diffs = compare_python_sources(text1, text2)
+    except SyntaxError as e:
+        warnings.append(f"Python parse failed, using line diff: {e}")
+        return None
+    diffs.sort(key=lambda d: extract_line_number(d['location']))
+    return {'identical': text1 == text2, 'diffs': diffs, 'warnings': warnings}
+
+def compare_xml(input1, input2, input_mode, warnings, budget=None):
+    """
+    Streaming structural compare for XML.
+    Returns a result dict, or None if either side is not well-formed (caller falls back to line diff).
+    """
+    try:
+        if input_mode == 'path':
+            diffs = compare_xml_files(input1, input2, budget)
+        else:
+            diffs = compare_xml_text(input1, input2, budget)
+    except ET.ParseError as e:
+        warnings.append(f"XML parse failed, using line diff: {e}")
+        return None
+    diffs.sort(key=lambda d: extract_line_number(d['location']))
+    return {'identical': len(diffs) == 0, 'diffs': diffs, 'warnings': warnings}
+
+def get_structured_diff(input1, input2, input_mode='path', file_type=None, time_budget=None, memory_budget=None,
+                        key_columns=None, ignore=None, ignore_patterns=None):
     """
     API to get structured diff.
     - input_mode: 'path' (default, file paths) or 'content' (string contents)
-    - file_type: optional, e.g., 'json', 'docx', 'text' (auto-detect if path)
-    Returns: dict with 'identical', 'diffs' list of {'location': str, 'level': str, 'desc': str}, 'warnings': list
+    - file_type: optional, e.g., 'json', 'docx', 'py', 'xml', 'text' (auto-detect if path)
+    - time_budget: optional seconds; memory_budget: optional bytes. When exceeded the diff
+      degrades to a coarser (block-level) result instead of running unbounded.
+    - key_columns: for 'csv'/'tsv', column names (or indexes) identifying a row; defaults to the first column
+    - ignore: for line-based compares, differences to ignore: 'line_endings', 'trailing_whitespace',
+      'whitespace', 'case', 'timestamps', 'uuids'; ignore_patterns: extra regexes to mask (trusted
+      patterns only: they run outside the time budget)
+    Returns: dict with 'identical', 'diffs' list of {'location': str, 'level': str, 'desc': str}, 'warnings': list,
+    'truncated': bool
     """
+    try:
+        detected = file_type or (os.path.splitext(input1)[1].lower()[1:] if input_mode == 'path' else None)
+        check_input_size(input1, input2, input_mode=input_mode, limit=input_limit(input_mode, detected))
+    except (InputTooLarge, OSError) as e:
+        return {'identical': False, 'diffs': [], 'warnings': [str(e)], 'error': str(e), 'truncated': False}
+    try:
+        normalize = build_normalizer(ignore, ignore_patterns)
+    except ValueError as e:
+        return {'identical': False, 'diffs': [], 'warnings': [str(e)], 'error': str(e), 'truncated': False}
+    budget = Budget(time_budget, memory_budget)
+    result = _structured_diff(input1, input2, input_mode, file_type, budget, key_columns, normalize)
+    result['truncated'] = budget.truncated
+    if budget.truncated:
+        result['warnings'].extend(f"Result truncated: {r}" for r in budget.reasons)
+    return result
+
+def _structured_diff(input1, input2, input_mode, file_type, budget, key_columns=None, normalize=None):
     diffs = []
     warnings = []
     try:
@@ -98,7 +214,7 @@ def get_structured_diff(input1, input2, input_mode='path', file_type=None):
             
             # Load data
             if file_type == 'docx':
-                diffs = compare_docx_files(input1, input2)
+                diffs = compare_docx_files(input1, input2, budget)
                 identical = len(diffs) == 0
                 return {'identical': identical, 'diffs': diffs, 'warnings': warnings}
             elif file_type == 'json':
@@ -112,17 +228,7 @@ def get_structured_diff(input1, input2, input_mode='path', file_type=None):
                     if j1 == j2:
                         return {'identical': True, 'diffs': [], 'warnings': warnings}
                     else:
-                        json_diffs = json_diff(j1, j2)
-                        for path, level, desc, side in json_diffs:
-                            if side == 'file1':
-                                content = content1
-                            elif side == 'file2':
-                                content = content2
-                            else:
-                                content = content1
-                            lineno = find_line_for_path(content, path)
-                            location = f'Line {lineno}' if lineno else path
-                            diffs.append({'location': location, 'level': level, 'desc': desc})
+                        diffs = json_located_diffs(json_diff(j1, j2, budget=budget), content1, content2, budget)
                         # Sort diffs by line number for better ordering
                         diffs.sort(key=lambda d: extract_line_number(d['location']))
                         return {'identical': False, 'diffs': diffs, 'warnings': warnings}
@@ -130,10 +236,43 @@ def get_structured_diff(input1, input2, input_mode='path', file_type=None):
                     pass  # fallback
                 lines1 = open_file_lines(input1)
                 lines2 = open_file_lines(input2)
+            elif file_type in ('csv', 'tsv'):
+                diffs = compare_csv_files(input1, input2, key_columns, '\t' if file_type == 'tsv' else None, budget)
+                diffs.sort(key=lambda d: extract_line_number(d['location']))
+                return {'identical': len(diffs) == 0, 'diffs': diffs, 'warnings': warnings}
+            elif file_type in ('py', 'python'):
+                lines1 = open_file_lines(input1)
+                lines2 = open_file_lines(input2)
+                result = compare_python_text(''.join(lines1), ''.join(lines2), warnings)
+                if result is not None:
+                    return result
+            elif file_type == 'xml':
+                result = compare_xml(input1, input2, input_mode, warnings, budget)
+                if result is not None:
+                    return result
+                try:
+                    # Streamed XML may exceed what the line diff fallback can hold
+                    check_input_size(input1, input2, input_mode='path')
+                except InputTooLarge as e:
+                    return {'identical': False, 'diffs': [], 'warnings': warnings, 'error': f"{e}; too large for the line diff fallback"}
+                lines1 = open_file_lines(input1)
+                lines2 = open_file_lines(input2)
             else:  # text etc.
                 lines1 = open_file_lines(input1)
                 lines2 = open_file_lines(input2)
         else:  # content mode, assume text or try json
+            if file_type in ('csv', 'tsv'):
+                diffs = compare_csv_text(input1, input2, key_columns, '\t' if file_type == 'tsv' else None, budget)
+                diffs.sort(key=lambda d: extract_line_number(d['location']))
+                return {'identical': len(diffs) == 0, 'diffs': diffs, 'warnings': warnings}
+            if file_type in ('py', 'python'):
+                result = compare_python_text(input1, input2, warnings)
+                if result is not None:
+                    return result
+            if file_type == 'xml':
+                result = compare_xml(input1, input2, input_mode, warnings, budget)
+                if result is not None:
+                    return result
             # Try JSON first, regardless of file_type
             try:
                 j1 = json.loads(input1)
@@ -141,17 +280,7 @@ def get_structured_diff(input1, input2, input_mode='path', file_type=None):
                 if j1 == j2:
                     return {'identical': True, 'diffs': [], 'warnings': warnings}
                 else:
-                    json_diffs = json_diff(j1, j2)
-                    for path, level, desc, side in json_diffs:
-                        if side == 'file1':
-                            content = input1
-                        elif side == 'file2':
-                            content = input2
-                        else:
-                            content = input1
-                        lineno = find_line_for_path(content, path)
-                        location = f'Line {lineno}' if lineno else path
-                        diffs.append({'location': location, 'level': level, 'desc': desc})
+                    diffs = json_located_diffs(json_diff(j1, j2, budget=budget), input1, input2, budget)
                     # Sort diffs by line number for better ordering
                     diffs.sort(key=lambda d: extract_line_number(d['location']))
                     return {'identical': False, 'diffs': diffs, 'warnings': warnings}
@@ -165,59 +294,14 @@ def get_structured_diff(input1, input2, input_mode='path', file_type=None):
         # Line-based compare
         if lines1 == lines2:
             return {'identical': True, 'diffs': [], 'warnings': warnings}
+        keys = None
+        if normalize is not None:
+            # Compare on normalized keys; equal after normalization means nothing left to diff
+            keys = (normalize_lines(lines1, normalize), normalize_lines(lines2, normalize))
+            if keys[0] == keys[1]:
+                return {'identical': True, 'diffs': [], 'warnings': warnings}
         
-        matcher = difflib.SequenceMatcher(None, lines1, lines2)
-        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-            if tag == 'equal':
-                continue
-            elif tag == 'delete':
-                # lines i1 to i2 in lines1 are extra (missing in lines2)
-                for idx in range(i1, i2):
-                    lineno = idx + 1
-                    diffs.append({'location': f'Left Line {lineno}', 'level': 'CRITICAL', 'desc': f'Extra content in file1: {lines1[idx].strip()}'})
-            elif tag == 'insert':
-                # lines j1 to j2 in lines2 are extra (missing in lines1)
-                for idx in range(j1, j2):
-                    lineno = idx + 1
-                    diffs.append({'location': f'Right Line {lineno}', 'level': 'CRITICAL', 'desc': f'Extra content in file2: {lines2[idx].strip()}'})
-            elif tag == 'replace':
-                # compare the ranges
-                len_a = i2 - i1
-                len_b = j2 - j1
-                max_len = max(len_a, len_b)
-                for k in range(max_len):
-                    l1 = lines1[i1 + k] if k < len_a else None
-                    l2 = lines2[j1 + k] if k < len_b else None
-                    if l1 is None:
-                        lineno = j1 + k + 1
-                        diffs.append({'location': f'Right Line {lineno}', 'level': 'CRITICAL', 'desc': f'Extra content in file2: {l2.strip()}'})
-                        continue
-                    if l2 is None:
-                        lineno = i1 + k + 1
-                        diffs.append({'location': f'Left Line {lineno}', 'level': 'CRITICAL', 'desc': f'Extra content in file1: {l1.strip()}'})
-                        continue
-                    lineno = i1 + k + 1  # for both
-                    l1_str = l1.rstrip('\n')
-                    l2_str = l2.rstrip('\n')
-                    if l1_str == l2_str:
-                        continue
-                    # Classify
-                    indent1 = len(l1_str) - len(l1_str.lstrip()) if l1_str else 0
-                    indent2 = len(l2_str) - len(l2_str.lstrip()) if l2_str else 0
-                    strip1 = l1_str.strip()
-                    strip2 = l2_str.strip()
-                    if strip1 == strip2:
-                        if indent1 != indent2:
-                            level = "ERROR"
-                            desc = f"indentation difference: {indent1} vs {indent2} spaces"
-                        else:
-                            level = "WARNING"
-                            desc = f"whitespace/spaces difference: '{l1_str}' vs '{l2_str}'"
-                    else:
-                        level = "CRITICAL"
-                        desc = f"content difference: '{l1_str}' vs '{l2_str}'"
-                    diffs.append({'location': f'Line {lineno}', 'level': level, 'desc': desc})
-        
+        diffs = diff_lines(lines1, lines2, budget=budget, keys=keys)
         # Sort diffs by line number for better ordering
         diffs.sort(key=lambda d: extract_line_number(d['location']))
         return {'identical': False, 'diffs': diffs, 'warnings': warnings}
@@ -231,60 +315,128 @@ def open_file_lines(file_path):
     except:
         return []
 
+def load_input_lines(data, input_mode='path', file_type=None):
+    """Lines of one input: extracted Docx paragraphs, file lines, or split content."""
+    if input_mode == 'path':
+        if file_type == 'docx':
+            lines = extract_docx_text(data)
+            if lines is None:
+                raise ValueError(f'Failed to extract text from Docx file: {data}')
+            return lines
+        return open_file_lines(data)
+    return data.splitlines(True)
+
+def load_docx(path):
+    try:
+        # python-docx is only needed for Docx compares; keep it off the import path
+        from docx import Document
+        return Document(path)
+    except Exception as e:
+        print(f"Error extracting docx: {e}")
+        return None
+
+def docx_shape_lines(doc):
+    """Summary lines for inline images and charts."""
+    images = []
+    charts = []
+    for shape in doc.inline_shapes:
+        if shape.type == 3:  # picture
+            name = getattr(shape._inline, 'docPr', None)
+            if name:
+                name = name.name
+            else:
+                name = 'Unknown'
+            images.append(name)
+        elif shape.type == 5:  # chart
+            name = getattr(shape._inline, 'docPr', None)
+            if name:
+                name = name.name
+            else:
+                name = 'Unknown'
+            charts.append(name)
+    lines = []
+    if images:
+        lines.append(f'[Images: {", ".join(images)}]\n')
+    if charts:
+        lines.append(f'[Charts: {", ".join(charts)}]\n')
+    return lines
+
+def paragraph_fingerprint(para):
+    """Cheap hash of the raw paragraph/run property XML, without resolving styles."""
+    from lxml import etree
+    p = para._p
+    parts = [etree.tostring(p.pPr) if p.pPr is not None else b'']
+    for r in p.r_lst:
+        parts.append(etree.tostring(r.rPr) if r.rPr is not None else b'-')
+    return hash(b'|'.join(parts))
+
+def paragraph_prefix(para):
+    """Paragraph-level markers: non-default style and alignment."""
+    prefix = ''
+    style_name = para.style.name if para.style else 'Normal'
+    if style_name.lower() != 'normal':
+        prefix += f'[{style_name}] '
+    alignment = para.alignment
+    if alignment:
+        prefix += f'[align:{alignment}] '
+    return prefix
+
+def format_runs(para):
+    text = ''
+    for run in para.runs:
+        run_styles = []
+        if run.bold:
+            run_styles.append('bold')
+        if run.italic:
+            run_styles.append('italic')
+        if run.underline:
+            run_styles.append('underline')
+        if run.font.color and run.font.color.rgb:
+            run_styles.append(f'color:{run.font.color.rgb}')
+        if run.font.size:
+            run_styles.append(f'size:{run.font.size.pt}pt')
+        if run.font.name:
+            run_styles.append(f'font:{run.font.name}')
+        # Add more if needed
+        if run_styles:
+            text += f'[{"; ".join(run_styles)}]{run.text}[/style]'
+        else:
+            text += run.text
+    return text
+
+def docx_paragraphs(doc):
+    """
+    Paragraphs that become a line: non-empty once formatted, so an empty paragraph with a
+    non-Normal style still counts. Formatting is only resolved for blank-text paragraphs.
+    """
+    return [p for p in doc.paragraphs if p.text.strip() or format_paragraph(p).strip()]
+
+def format_paragraph(para):
+    """Paragraph text with style, alignment and run formatting markers."""
+    return paragraph_prefix(para) + format_runs(para)
+
+def compare_paragraph_formatting(para1, para2):
+    """
+    Compare formatting of two paragraphs with the same text.
+    Returns (level, desc) or None: style/alignment changes are ERROR, run formatting WARNING.
+    """
+    prefix1 = paragraph_prefix(para1)
+    prefix2 = paragraph_prefix(para2)
+    if prefix1 != prefix2:
+        return "ERROR", f"paragraph style difference: '{prefix1.strip() or '[Normal]'}' vs '{prefix2.strip() or '[Normal]'}'"
+    runs1 = format_runs(para1)
+    runs2 = format_runs(para2)
+    if runs1 != runs2:
+        return "WARNING", f"formatting difference: '{runs1}' vs '{runs2}'"
+    return None
+
 def extract_docx_text(path):
+    doc = load_docx(path)
+    if doc is None:
+        return None
     try:
-        doc = Document(path)
-        text = []
-        images = []
-        charts = []
-        for shape in doc.inline_shapes:
-            if shape.type == 3:  # picture
-                name = getattr(shape._inline, 'docPr', None)
-                if name:
-                    name = name.name
-                else:
-                    name = 'Unknown'
-                images.append(name)
-            elif shape.type == 5:  # chart
-                name = getattr(shape._inline, 'docPr', None)
-                if name:
-                    name = name.name
-                else:
-                    name = 'Unknown'
-                charts.append(name)
-        for para in doc.paragraphs:
-            para_text = ''
-            style_name = para.style.name if para.style else 'Normal'
-            if style_name.lower() != 'normal':
-                para_text += f'[{style_name}] '
-            alignment = para.alignment
-            if alignment:
-                para_text += f'[align:{alignment}] '
-            for run in para.runs:
-                run_styles = []
-                if run.bold:
-                    run_styles.append('bold')
-                if run.italic:
-                    run_styles.append('italic')
-                if run.underline:
-                    run_styles.append('underline')
-                if run.font.color and run.font.color.rgb:
-                    run_styles.append(f'color:{run.font.color.rgb}')
-                if run.font.size:
-                    run_styles.append(f'size:{run.font.size.pt}pt')
-                if run.font.name:
-                    run_styles.append(f'font:{run.font.name}')
-                # Add more if needed
-                if run_styles:
-                    para_text += f'[{"; ".join(run_styles)}]{run.text}[/style]'
-                else:
-                    para_text += run.text
-            if para_text.strip():
-                text.append(para_text + '\n')
-        if images:
-            text.append(f'[Images: {", ".join(images)}]\n')
-        if charts:
-            text.append(f'[Charts: {", ".join(charts)}]\n')
+        text = [format_paragraph(para) + '\n' for para in docx_paragraphs(doc)]
+        text.extend(docx_shape_lines(doc))
         return text
     except Exception as e:
         print(f"Error extracting docx: {e}")
@@ -301,8 +453,30 @@ def find_line_for_path(content, path):
             return i
     return None
 
-def json_diff(d1, d2, path=""):
+def json_located_diffs(json_diffs, content1, content2, budget=None):
+    """Turn json_diff tuples into diff records, locating each path's line in the side it belongs to."""
     diffs = []
+    for path, level, desc, side in json_diffs:
+        if side == 'file2':
+            content = content2
+        else:
+            content = content1
+        lineno = None
+        if budget is not None and budget.expired():
+            budget.degrade("time budget exceeded; JSON paths reported without line numbers")
+        else:
+            lineno = find_line_for_path(content, path)
+        location = f'Line {lineno}' if lineno else path
+        diffs.append({'location': location, 'level': level, 'desc': desc})
+    return diffs
+
+def json_diff(d1, d2, path="", budget=None):
+    diffs = []
+    if budget is not None and budget.expired():
+        budget.degrade("time budget exceeded during JSON compare")
+        if d1 != d2:
+            diffs.append((path or "root", "CRITICAL", "subtree differs (comparison truncated)", "both"))
+        return diffs
     if type(d1) != type(d2):
         diffs.append((path or "root", "CRITICAL", f"type mismatch: {type(d1)} vs {type(d2)}", "both"))
         return diffs
@@ -315,7 +489,7 @@ def json_diff(d1, d2, path=""):
             elif k not in d2:
                 diffs.append((new_path, "CRITICAL", "missing in file2", "file1"))
             else:
-                diffs.extend(json_diff(d1[k], d2[k], new_path))
+                diffs.extend(json_diff(d1[k], d2[k], new_path, budget))
     elif isinstance(d1, list):
         max_len = max(len(d1), len(d2))
         for i in range(max_len):
@@ -325,7 +499,7 @@ def json_diff(d1, d2, path=""):
             elif i >= len(d2):
                 diffs.append((new_path, "CRITICAL", "missing in file2", "file1"))
             else:
-                diffs.extend(json_diff(d1[i], d2[i], new_path))
+                diffs.extend(json_diff(d1[i], d2[i], new_path, budget))
     elif d1 != d2:
         diffs.append((path or "root", "CRITICAL", f"value mismatch: {d1} vs {d2}", "both"))
     return diffs
@@ -0,0 +1,213 @@
+import csv
+import io
+import operator
+
+# Rows between budget checks
+CHECK_EVERY = 1000
+
+# Index markers: key not in file1 / key already met in file2
+_ABSENT = object()
+_SEEN = None
+
+class _LineSource:
+    """Iterate decoded lines of a binary file while tracking the byte offset consumed so far."""
+    def __init__(self, f):
+        self.f = f
+        self.offset = f.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.f.readline()
+        if not line:
+            raise StopIteration
+        # Excel exports start with a UTF-8 BOM; keep it out of the first header cell
+        encoding = 'utf-8-sig' if self.offset == 0 else 'utf-8'
+        self.offset += len(line)
+        return line.decode(encoding)
+
+def _records(f, dialect):
+    """Yield (byte offset, line number, row) for each CSV record, reading the file one line at a time."""
+    source = _LineSource(f)
+    reader = csv.reader(source, dialect)
+    while True:
+        offset = source.offset
+        line = reader.line_num + 1
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        if row:
+            yield offset, line, row
+
+def _read_record(f, offset, dialect):
+    f.seek(offset)
+    return next(csv.reader(_LineSource(f), dialect))
+
+def _dialect(f, delimiter=None):
+    if delimiter:
+        class Dialect(csv.excel):
+            pass
+        Dialect.delimiter = delimiter
+        return Dialect
+    sample = f.read(4096).decode('utf-8', errors='ignore')
+    f.seek(0)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=',\t;|')
+    except csv.Error:
+        return csv.excel
+
+def _resolve_keys(header, key_columns):
+    if not key_columns:
+        return [0]
+    idx = []
+    for key in key_columns:
+        if isinstance(key, int) or (isinstance(key, str) and key.isdigit() and key not in header):
+            idx.append(int(key))
+        elif key in header:
+            idx.append(header.index(key))
+        else:
+            raise ValueError(f"Key column not found: {key}")
+    return idx
+
+def _cell(row, i):
+    return row[i] if i < len(row) else ''
+
+def _getter(indexes):
+    """Tuple of the given columns; short rows are padded with ''."""
+    width = max(indexes) + 1 if indexes else 0
+    get = operator.itemgetter(*indexes) if len(indexes) > 1 else None
+
+    def values(row):
+        if len(row) < width:
+            row = row + [''] * (width - len(row))
+        if get is not None:
+            return get(row)
+        return tuple(row[i] for i in indexes)
+    return values
+
+def _label(names, key):
+    return ', '.join(f'{n}={v}' for n, v in zip(names, key))
+
+def _one_sided(rows, header, key_columns, side, budget):
+    """Diffs when the other file is empty: every row of this side is added (file2) or removed (file1)."""
+    other = 2 if side == 1 else 1
+    diffs = [{'location': 'File', 'level': 'CRITICAL', 'desc': f'file{other} is empty'}]
+    keys = _resolve_keys(header, key_columns)
+    key_names = [header[i] if i < len(header) else str(i) for i in keys]
+    key_of = _getter(keys)
+    for count, (_, line, row) in enumerate(rows):
+        if budget is not None and count % CHECK_EVERY == 0 and budget.expired():
+            budget.degrade(f"time budget exceeded while listing file{side} rows")
+            break
+        if side == 1:
+            diffs.append({'location': f'Left Line {line}', 'level': 'CRITICAL', 'desc': f'row removed ({_label(key_names, key_of(row))})'})
+        else:
+            diffs.append({'location': f'Right Line {line}', 'level': 'CRITICAL', 'desc': f'row added ({_label(key_names, key_of(row))})'})
+    return diffs
+
+def compare_csv_streams(f1, f2, key_columns=None, delimiter=None, budget=None):
+    """
+    Key-based compare of two CSV/TSV streams (seekable binary files, UTF-8).
+    The left side is streamed into an index of key -> (row hash, offset, line); the right side
+    is streamed against it (hash join), so memory is one key index, not either file's rows.
+    Rows whose hash differs are re-read from the left by offset for per-cell differences.
+    Columns are matched by header name, so column order does not matter.
+    """
+    dialect1 = _dialect(f1, delimiter)
+    dialect2 = _dialect(f2, delimiter)
+    rows1 = _records(f1, dialect1)
+    rows2 = _records(f2, dialect2)
+    diffs = []
+    first1 = next(rows1, None)
+    first2 = next(rows2, None)
+    if first1 is None and first2 is None:
+        return diffs
+    if first1 is None:
+        return _one_sided(rows2, first2[2], key_columns, 2, budget)
+    if first2 is None:
+        return _one_sided(rows1, first1[2], key_columns, 1, budget)
+    header1, header2 = first1[2], first2[2]
+    keys1 = _resolve_keys(header1, key_columns)
+    key_names = [header1[i] if i < len(header1) else str(i) for i in keys1]
+    keys2 = [header2.index(name) if name in header2 else None for name in key_names]
+    if None in keys2:
+        raise ValueError(f"Key column missing in file2: {key_names[keys2.index(None)]}")
+
+    common = [name for name in header1 if name in header2]
+    for name in header1:
+        if name not in header2:
+            diffs.append({'location': 'Left Line 1', 'level': 'ERROR', 'desc': f"column '{name}' missing in file2"})
+    for name in header2:
+        if name not in header1:
+            diffs.append({'location': 'Right Line 1', 'level': 'ERROR', 'desc': f"column '{name}' missing in file1"})
+    cols1 = [header1.index(name) for name in common]
+    cols2 = [header2.index(name) for name in common]
+    key_of1, key_of2 = _getter(keys1), _getter(keys2)
+    values_of1, values_of2 = _getter(cols1), _getter(cols2)
+
+    index = {}
+    duplicates = 0
+    for count, (offset, line, row) in enumerate(rows1):
+        if budget is not None and count % CHECK_EVERY == 0 and budget.expired():
+            budget.degrade("time budget exceeded while indexing file1 rows")
+            return diffs
+        key = key_of1(row)
+        if key in index:
+            duplicates += 1
+            continue
+        index[key] = (hash(values_of1(row)), offset, line)
+    if duplicates:
+        diffs.append({'location': 'File', 'level': 'WARNING', 'desc': f'{duplicates} duplicate key(s) in file1; first occurrence used'})
+
+    complete = True
+    duplicates = 0
+    for count, (_, line, row) in enumerate(rows2):
+        if budget is not None and count % CHECK_EVERY == 0 and budget.expired():
+            budget.degrade("time budget exceeded while joining file2 rows")
+            complete = False
+            break
+        key = key_of2(row)
+        entry = index.get(key, _ABSENT)
+        if entry is _SEEN:
+            duplicates += 1
+            continue
+        # Keep the key as a marker so a repeat in file2 is caught as a duplicate
+        index[key] = _SEEN
+        if entry is _ABSENT:
+            diffs.append({'location': f'Right Line {line}', 'level': 'CRITICAL', 'desc': f'row added ({_label(key_names, key)})'})
+            continue
+        row_hash, offset, line1 = entry
+        values2 = values_of2(row)
+        if hash(values2) == row_hash:
+            continue
+        row1 = _read_record(f1, offset, dialect1)
+        cells = []
+        whitespace_only = True
+        for name, i1, v2 in zip(common, cols1, values2):
+            v1 = _cell(row1, i1)
+            if v1 != v2:
+                cells.append(f"{name}: '{v1}' vs '{v2}'")
+                whitespace_only = whitespace_only and v1.strip() == v2.strip()
+        if cells:
+            level = 'WARNING' if whitespace_only else 'CRITICAL'
+            desc = f"row changed ({_label(key_names, key)}, left line {line1}): " + '; '.join(cells)
+            diffs.append({'location': f'Right Line {line}', 'level': level, 'desc': desc})
+    if duplicates:
+        diffs.append({'location': 'File', 'level': 'WARNING', 'desc': f'{duplicates} duplicate key(s) in file2; first occurrence used'})
+    if complete:
+        for key, entry in index.items():
+            if entry is _SEEN:
+                continue
+            line1 = entry[2]
+            diffs.append({'location': f'Left Line {line1}', 'level': 'CRITICAL', 'desc': f'row removed ({_label(key_names, key)})'})
+    return diffs
+
+def compare_csv_files(path1, path2, key_columns=None, delimiter=None, budget=None):
+    with open(path1, 'rb') as f1, open(path2, 'rb') as f2:
+        return compare_csv_streams(f1, f2, key_columns, delimiter, budget)
+
+def compare_csv_text(text1, text2, key_columns=None, delimiter=None, budget=None):
+    return compare_csv_streams(io.BytesIO(text1.encode('utf-8')), io.BytesIO(text2.encode('utf-8')),
+                               key_columns, delimiter, budget)
@@ -0,0 +1,101 @@
+from collections import deque
+
+MIN_MOVE_LINES = 2
+# A moved block must carry at least this many letters/digits; braces and blank lines repeat everywhere
+MIN_MOVE_CHARS = 8
+_BASE = 1000003
+_MASK = (1 << 61) - 1
+
+def _changed_runs(opcodes, side):
+    """Maximal runs [start, end) of changed lines on one side ('left' or 'right')."""
+    runs = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            continue
+        start, end = (i1, i2) if side == 'left' else (j1, j2)
+        if start == end:
+            continue
+        if runs and runs[-1][1] == start:
+            runs[-1][1] = end
+        else:
+            runs.append([start, end])
+    return runs
+
+def _content_chars(line):
+    return sum(c.isalnum() for c in line)
+
+def _window_hashes(keys, start, end, k):
+    """Yield (pos, hash) for every k-line window in keys[start:end] using a rolling hash."""
+    if end - start < k:
+        return
+    top = pow(_BASE, k - 1, _MASK)
+    h = 0
+    for idx in range(start, start + k):
+        h = (h * _BASE + keys[idx]) % _MASK
+    yield start, h
+    for pos in range(start + 1, end - k + 1):
+        h = ((h - keys[pos - 1] * top) * _BASE + keys[pos + k - 1]) % _MASK
+        yield pos, h
+
+def find_moved_blocks(lines1, lines2, opcodes, min_lines=MIN_MOVE_LINES):
+    """
+    Detect blocks of at least min_lines that were deleted in one place and inserted in another.
+    Windows with fewer than MIN_MOVE_CHARS letters/digits (closing braces, blank lines) never seed a move.
+    Deleted windows are indexed by rolling hash, inserted runs are scanned once and matches
+    are extended greedily, so the work is linear in the number of changed lines.
+    Returns (moves, moved_left, moved_right): moves is a list of (i1, i2, j1, j2) ranges,
+    moved_left/moved_right are sets of line indexes consumed by moves.
+    """
+    keys1 = [hash(l.rstrip('\r\n')) for l in lines1]
+    keys2 = [hash(l.rstrip('\r\n')) for l in lines2]
+    left_runs = _changed_runs(opcodes, 'left')
+    right_runs = _changed_runs(opcodes, 'right')
+    run_end1 = {}
+    index = {}
+    for start, end in left_runs:
+        for idx in range(start, end):
+            run_end1[idx] = end
+        for pos, h in _window_hashes(keys1, start, end, min_lines):
+            index.setdefault(h, deque()).append(pos)
+
+    moves = []
+    moved_left = set()
+    moved_right = set()
+    if not index:
+        return moves, moved_left, moved_right
+    weight2 = {}
+    for start, end in right_runs:
+        for idx in range(start, end):
+            weight2[idx] = _content_chars(lines2[idx])
+    for start, end in right_runs:
+        window = dict(_window_hashes(keys2, start, end, min_lines))
+        j = start
+        while j <= end - min_lines:
+            candidates = index.get(window[j])
+            if not candidates or sum(weight2[x] for x in range(j, j + min_lines)) < MIN_MOVE_CHARS:
+                j += 1
+                continue
+            # Windows consumed by an earlier move are dropped from the front as they surface
+            while candidates and moved_left.intersection(range(candidates[0], candidates[0] + min_lines)):
+                candidates.popleft()
+            match = None
+            for pos in candidates:
+                if moved_left.intersection(range(pos, pos + min_lines)):
+                    continue
+                if lines1[pos:pos + min_lines] == lines2[j:j + min_lines]:
+                    match = pos
+                    break
+            if match is None:
+                j += 1
+                continue
+            i = match
+            i_end = run_end1[i]
+            length = min_lines
+            while (j + length < end and i + length < i_end and i + length not in moved_left
+                   and lines1[i + length] == lines2[j + length]):
+                length += 1
+            moves.append((i, i + length, j, j + length))
+            moved_left.update(range(i, i + length))
+            moved_right.update(range(j, j + length))
+            j += length
+    return moves, moved_left, moved_right
@@ -0,0 +1,56 @@
+import re
+
+# Named masks for volatile fields; matches are replaced by a placeholder before comparing
+MASKS = {
+    'timestamps': r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?',
+    'uuids': r'\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b',
+}
+RULES = ('line_endings', 'trailing_whitespace', 'whitespace', 'case') + tuple(MASKS)
+
+MASK_PLACEHOLDER = '\0'
+
+def build_normalizer(ignore=None, patterns=None):
+    """
+    Compose ignore rules into one function applied to each line.
+    - ignore: rule names from RULES ('line_endings', 'trailing_whitespace', 'whitespace', 'case',
+      'timestamps', 'uuids')
+    - patterns: extra regexes whose matches are masked
+    Returns None when nothing is ignored. Raises ValueError for an unknown rule or a bad pattern.
+    """
+    ignore = set(ignore or [])
+    unknown = ignore - set(RULES)
+    if unknown:
+        raise ValueError(f"Unknown ignore rule(s): {', '.join(sorted(unknown))}")
+    builtin = [MASKS[name] for name in MASKS if name in ignore]
+    if not ignore and not patterns:
+        return None
+    # The built-in masks share one alternation so each line is scanned once for all of them;
+    # caller patterns are compiled and applied one by one, so their flags and group numbers hold
+    masks = [re.compile('|'.join(f'(?:{p})' for p in builtin))] if builtin else []
+    for pattern in patterns or []:
+        try:
+            masks.append(re.compile(pattern))
+        except re.error as e:
+            raise ValueError(f"Invalid ignore pattern {pattern!r}: {e}")
+    whitespace = 'whitespace' in ignore
+    trailing = 'trailing_whitespace' in ignore
+    line_endings = 'line_endings' in ignore
+    case = 'case' in ignore
+
+    def normalize(line):
+        for mask in masks:
+            line = mask.sub(MASK_PLACEHOLDER, line)
+        if whitespace:
+            line = ''.join(line.split())
+        elif trailing:
+            line = line.rstrip()
+        elif line_endings:
+            line = line.rstrip('\r\n')
+        if case:
+            line = line.casefold()
+        return line
+    return normalize
+
+def normalize_lines(lines, normalize):
+    """Comparison keys for lines; keys[i] belongs to lines[i], so locations map straight back."""
+    return [normalize(line) for line in lines]
@@ -0,0 +1,218 @@
+import ast
+import bisect
+import difflib
+import hashlib
+
+DEF_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+def subtree_hashes(tree, bodies=None):
+    """
+    Hash every node of an AST bottom-up in a single pass.
+    Line/column attributes are ignored, so reformatting does not change a hash.
+    Returns dict of id(node) -> digest. If bodies is a dict, it is filled with
+    id(def node) -> digest of the function/class without its own name (to match renames).
+    """
+    hashes = {}
+
+    def visit(node):
+        h = hashlib.blake2b(type(node).__name__.encode(), digest_size=16)
+        is_def = isinstance(node, DEF_TYPES)
+        for name, value in ast.iter_fields(node):
+            if is_def and name == 'name':
+                continue
+            h.update(name.encode())
+            if isinstance(value, list):
+                h.update(b'[')
+                for item in value:
+                    h.update(visit(item) if isinstance(item, ast.AST) else repr(item).encode())
+                    h.update(b',')
+                h.update(b']')
+            elif isinstance(value, ast.AST):
+                h.update(visit(value))
+            else:
+                h.update(repr(value).encode())
+            h.update(b';')
+        if is_def:
+            if bodies is not None:
+                bodies[id(node)] = h.digest()
+            h.update(b'name' + repr(node.name).encode())
+        digest = h.digest()
+        hashes[id(node)] = digest
+        return digest
+
+    visit(tree)
+    return hashes
+
+def _shell_hash(node, hashes):
+    """Hash of a class with its nested definitions left out (header and plain statements only)."""
+    h = hashlib.blake2b(node.name.encode(), digest_size=16)
+    for child in node.decorator_list + node.bases + node.keywords:
+        h.update(hashes[id(child)])
+    for stmt in node.body:
+        if not isinstance(stmt, DEF_TYPES):
+            h.update(hashes[id(stmt)])
+    return h.digest()
+
+def _span(node):
+    start = min([node.lineno] + [d.lineno for d in getattr(node, 'decorator_list', [])])
+    return start, getattr(node, 'end_lineno', None) or node.lineno
+
+def _collect_defs(body, hashes, bodies, parent='', out=None):
+    """Collect functions and classes (recursing into class bodies) keyed by qualified name."""
+    if out is None:
+        out = []
+    index = 0
+    for node in body:
+        if not isinstance(node, DEF_TYPES):
+            continue
+        qualname = f'{parent}.{node.name}' if parent else node.name
+        is_class = isinstance(node, ast.ClassDef)
+        out.append({
+            'name': qualname,
+            'short': node.name,
+            'parent': parent,
+            'index': index,
+            'kind': 'class' if is_class else 'function',
+            'hash': hashes[id(node)],
+            'body': bodies[id(node)],
+            'shell': _shell_hash(node, hashes) if is_class else hashes[id(node)],
+            'span': _span(node),
+        })
+        index += 1
+        if is_class:
+            _collect_defs(node.body, hashes, bodies, qualname, out)
+    return out
+
+def _fmt_span(span):
+    start, end = span
+    return f'line {start}' if start == end else f'lines {start}-{end}'
+
+def _moved(pairs):
+    """
+    Return the pairs that changed relative order within their scope.
+    Pairs kept in place form the longest increasing run of right-side indexes.
+    """
+    by_parent = {}
+    for left, right in pairs:
+        by_parent.setdefault((left['parent'], right['parent']), []).append((left, right))
+    moved = []
+    for group in by_parent.values():
+        group.sort(key=lambda p: p[0]['index'])
+        # Patience-style LIS over right indexes: O(k log k) per scope
+        tails, tails_idx, prev = [], [], [None] * len(group)
+        for i, (_, right) in enumerate(group):
+            pos = bisect.bisect_left(tails, right['index'])
+            if pos == len(tails):
+                tails.append(right['index'])
+                tails_idx.append(i)
+            else:
+                tails[pos] = right['index']
+                tails_idx[pos] = i
+            prev[i] = tails_idx[pos - 1] if pos else None
+        keep = set()
+        i = tails_idx[-1] if tails_idx else None
+        while i is not None:
+            keep.add(i)
+            i = prev[i]
+        moved.extend(p for i, p in enumerate(group) if i not in keep)
+    return moved
+
+def _statement_diffs(tree1, tree2, hashes1, hashes2, lines1, lines2):
+    """Diff module-level statements that are not definitions, compared by subtree hash."""
+    stmts1 = [n for n in tree1.body if not isinstance(n, DEF_TYPES)]
+    stmts2 = [n for n in tree2.body if not isinstance(n, DEF_TYPES)]
+    keys1 = [hashes1[id(n)] for n in stmts1]
+    keys2 = [hashes2[id(n)] for n in stmts2]
+    diffs = []
+    matcher = difflib.SequenceMatcher(None, keys1, keys2, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        for node in stmts1[i1:i2]:
+            start, end = _span(node)
+            diffs.append({'location': f'Left Line {start}', 'level': 'CRITICAL',
+                          'desc': f'statement removed ({_fmt_span((start, end))}): {lines1[start - 1].strip()}'})
+        for node in stmts2[j1:j2]:
+            start, end = _span(node)
+            diffs.append({'location': f'Right Line {start}', 'level': 'CRITICAL',
+                          'desc': f'statement added ({_fmt_span((start, end))}): {lines2[start - 1].strip()}'})
+    return diffs
+
+def compare_python_sources(text1, text2):
+    """
+    Structural diff of two Python sources.
+    Functions and classes are matched by qualified name, then by subtree hash,
+    so reordering and reformatting are not reported as line rewrites.
+    Raises SyntaxError if either side does not parse.
+    """
+    tree1 = ast.parse(text1)
+    tree2 = ast.parse(text2)
+    bodies1, bodies2 = {}, {}
+    hashes1 = subtree_hashes(tree1, bodies1)
+    hashes2 = subtree_hashes(tree2, bodies2)
+    lines1 = text1.splitlines()
+    lines2 = text2.splitlines()
+    if hashes1[id(tree1)] == hashes2[id(tree2)]:
+        if text1 == text2:
+            return []
+        return [{'location': 'File', 'level': 'WARNING', 'desc': 'formatting/comment differences only (no structural change)'}]
+
+    defs1 = _collect_defs(tree1.body, hashes1, bodies1)
+    defs2 = _collect_defs(tree2.body, hashes2, bodies2)
+    diffs = []
+
+    # Pass 1: same qualified name
+    left_by_name = {}
+    for d in defs1:
+        left_by_name.setdefault(d['name'], []).append(d)
+    pairs = []
+    unmatched2 = []
+    for d in defs2:
+        candidates = left_by_name.get(d['name'])
+        if candidates:
+            pairs.append((candidates.pop(0), d))
+        else:
+            unmatched2.append(d)
+    unmatched1 = [d for ds in left_by_name.values() for d in ds]
+
+    # Pass 2: identical body (name excluded) under a different name or in a different scope
+    left_by_hash = {}
+    for d in unmatched1:
+        left_by_hash.setdefault(d['body'], []).append(d)
+    added = []
+    relocated = {}
+    for d in unmatched2:
+        candidates = left_by_hash.get(d['body'])
+        if not candidates:
+            added.append(d)
+            continue
+        left = candidates.pop(0)
+        relocated[left['name']] = d['name']
+        spans = f"(left {_fmt_span(left['span'])}, right {_fmt_span(d['span'])})"
+        if left['short'] != d['short']:
+            diffs.append({'location': f"Right Line {d['span'][0]}", 'level': 'ERROR',
+                          'desc': f"{d['kind']} '{left['name']}' renamed to '{d['name']}' {spans}"})
+        elif relocated.get(left['parent']) != d['parent']:
+            # Same name in another scope; members of a renamed/moved class move with it silently
+            diffs.append({'location': f"Right Line {d['span'][0]}", 'level': 'WARNING',
+                          'desc': f"{d['kind']} '{left['name']}' moved to '{d['name']}' {spans}"})
+    removed = [d for ds in left_by_hash.values() for d in ds]
+
+    for d in removed:
+        diffs.append({'location': f"Left Line {d['span'][0]}", 'level': 'CRITICAL',
+                      'desc': f"{d['kind']} '{d['name']}' removed ({_fmt_span(d['span'])})"})
+    for d in added:
+        diffs.append({'location': f"Right Line {d['span'][0]}", 'level': 'CRITICAL',
+                      'desc': f"{d['kind']} '{d['name']}' added ({_fmt_span(d['span'])})"})
+    for left, right in pairs:
+        if left['shell'] != right['shell']:
+            diffs.append({'location': f"Right Line {right['span'][0]}", 'level': 'CRITICAL',
+                          'desc': f"{right['kind']} '{right['name']}' modified "
+                                  f"(left {_fmt_span(left['span'])}, right {_fmt_span(right['span'])})"})
+    for left, right in _moved(pairs):
+        diffs.append({'location': f"Right Line {right['span'][0]}", 'level': 'WARNING',
+                      'desc': f"{right['kind']} '{right['name']}' moved from left {_fmt_span(left['span'])} "
+                              f"to right {_fmt_span(right['span'])}"})
+
+    diffs.extend(_statement_diffs(tree1, tree2, hashes1, hashes2, lines1, lines2))
+    return diffs
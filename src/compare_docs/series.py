@@ -0,0 +1,77 @@
+import os
+
+from .core import diff_lines, load_input_lines, extract_line_number
+from .budget import Budget, InputTooLarge, budgeted_opcodes, check_input_size
+from .three_way import intern_lines
+
+def blame_series(keys_list, opcodes_list):
+    """
+    Walk consecutive opcodes once, carrying each line's origin version forward.
+    Returns (origins of the last version's lines, removed lines as (version, index, introduced, removed)).
+    """
+    origins = [0] * len(keys_list[0])
+    removed = []
+    for k, opcodes in enumerate(opcodes_list):
+        new_origins = [None] * len(keys_list[k + 1])
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == 'equal':
+                new_origins[j1:j2] = origins[i1:i2]
+                continue
+            for i in range(i1, i2):
+                removed.append((k, i, origins[i], k + 1))
+            for j in range(j1, j2):
+                new_origins[j] = k + 1
+        origins = new_origins
+    return origins, removed
+
+def get_series_diff(inputs, input_mode='path', file_type=None, labels=None, time_budget=None, memory_budget=None):
+    """
+    Compare N ordered revisions of a document.
+    Each revision is extracted once and all lines share one intern table, so the work is
+    one diff per consecutive pair plus a linear blame pass.
+    Returns: dict with 'versions' (labels), 'steps' (one /compare-style result per consecutive pair,
+    with 'from'/'to'), 'blame' (last version's lines with 'introduced_in'), 'removed'
+    (lines with 'introduced_in'/'removed_in'), 'warnings', 'truncated'
+    """
+    warnings = []
+    if len(inputs) < 2:
+        return {'versions': [], 'steps': [], 'blame': [], 'removed': [], 'warnings': ['Need at least two inputs'],
+                'error': 'Need at least two inputs', 'truncated': False}
+    try:
+        check_input_size(*inputs, input_mode=input_mode)
+    except (InputTooLarge, OSError) as e:
+        return {'versions': [], 'steps': [], 'blame': [], 'removed': [], 'warnings': [str(e)], 'error': str(e), 'truncated': False}
+    if labels is None:
+        if input_mode == 'path':
+            labels = [os.path.basename(p) for p in inputs]
+        else:
+            labels = [f'v{i + 1}' for i in range(len(inputs))]
+    if input_mode == 'path' and not file_type:
+        ext = os.path.splitext(inputs[0])[1].lower()
+        file_type = ext[1:] if ext else 'text'
+    budget = Budget(time_budget, memory_budget)
+    try:
+        lines_list = [load_input_lines(data, input_mode, file_type) for data in inputs]
+        keys_list, _ = intern_lines(lines_list)
+        steps = []
+        opcodes_list = []
+        for k in range(len(inputs) - 1):
+            opcodes = budgeted_opcodes(keys_list[k], keys_list[k + 1], budget)
+            opcodes_list.append(opcodes)
+            diffs = diff_lines(lines_list[k], lines_list[k + 1], opcodes, budget)
+            diffs.sort(key=lambda d: extract_line_number(d['location']))
+            steps.append({'from': labels[k], 'to': labels[k + 1], 'identical': not diffs, 'diffs': diffs})
+        origins, removed = blame_series(keys_list, opcodes_list)
+        last = lines_list[-1]
+        blame = [{'line': j + 1, 'text': last[j].rstrip('\n'), 'introduced_in': labels[origins[j]]}
+                 for j in range(len(last))]
+        removed = [{'version': labels[v], 'line': i + 1, 'text': lines_list[v][i].rstrip('\n'),
+                    'introduced_in': labels[intro], 'removed_in': labels[gone]}
+                   for v, i, intro, gone in removed]
+        if budget.truncated:
+            warnings.extend(f"Result truncated: {r}" for r in budget.reasons)
+        return {'versions': labels, 'steps': steps, 'blame': blame, 'removed': removed,
+                'warnings': warnings, 'truncated': budget.truncated}
+    except Exception as e:
+        return {'versions': labels, 'steps': [], 'blame': [], 'removed': [], 'warnings': [str(e)], 'error': str(e),
+                'truncated': budget.truncated}
@@ -0,0 +1,216 @@
+import os
+import json
+import time
+
+from .core import load_input_lines, find_line_for_path, extract_line_number
+from .budget import (Budget, InputTooLarge, PARALLEL_MIN_LINES, PARALLEL_WORKERS, budgeted_opcodes,
+                     check_input_size, estimate_bytes, process_pool)
+
+_MISSING = object()
+
+KIND_LABELS = {
+    'left': 'left-only change',
+    'right': 'right-only change',
+    'both': 'same change on both sides',
+    'conflict': 'conflicting change',
+}
+
+def intern_lines(line_lists):
+    """Map lines to small ints with one table shared by all inputs; returns (keys per input, table)."""
+    table = {}
+    keys = []
+    for lines in line_lists:
+        keys.append([table.setdefault(line, len(table)) for line in lines])
+    return keys, table
+
+def _opcodes_job(keys1, keys2, time_budget, memory_budget, parallel=True):
+    budget = Budget(time_budget, memory_budget)
+    opcodes = budgeted_opcodes(keys1, keys2, budget, parallel)
+    return opcodes, budget.reasons
+
+def _hunks(opcodes):
+    """Changed regions as (base_start, base_end, side_start, side_end)."""
+    return [(i1, i2, j1, j2) for tag, i1, i2, j1, j2 in opcodes if tag != 'equal']
+
+def _span(start, end):
+    if end - start <= 1:
+        return f'line {start + 1}' if end > start else f'before line {start + 1}'
+    return f'lines {start + 1}-{end}'
+
+def _first_text(lines, start, end):
+    return lines[start].strip() if end > start else ''
+
+def merge_hunks(left_hunks, right_hunks, keys_left, keys_right):
+    """
+    diff3-style merge of two hunk lists against the same base.
+    Overlapping (or same-point) hunks are grouped; a group touched by one side only is a
+    one-sided change, by both sides with identical content 'both', otherwise a conflict.
+    Yields (kind, base_start, base_end, left_hunks, right_hunks).
+    """
+    tagged = sorted([(h[0], h[1], 'left', h) for h in left_hunks] + [(h[0], h[1], 'right', h) for h in right_hunks],
+                    key=lambda t: (t[0], t[1]))
+    group = None
+    for start, end, side, hunk in tagged:
+        if group is not None and (start < group[1] or (start == group[1] == group[0]) or start == end == group[1]):
+            group[1] = max(group[1], end)
+            group[2][side].append(hunk)
+            continue
+        if group is not None:
+            yield _classify(group, keys_left, keys_right)
+        group = [start, end, {'left': [], 'right': []}]
+        group[2][side].append(hunk)
+    if group is not None:
+        yield _classify(group, keys_left, keys_right)
+
+def _classify(group, keys_left, keys_right):
+    start, end, sides = group
+    left, right = sides['left'], sides['right']
+    if not right:
+        kind = 'left'
+    elif not left:
+        kind = 'right'
+    else:
+        # Same base range replaced by the same content on both sides
+        new_left = [k for h in left for k in keys_left[h[2]:h[3]]]
+        new_right = [k for h in right for k in keys_right[h[2]:h[3]]]
+        same_range = [(h[0], h[1]) for h in left] == [(h[0], h[1]) for h in right]
+        kind = 'both' if same_range and new_left == new_right else 'conflict'
+    return kind, start, end, left, right
+
+def _line_records(base_lines, left_lines, right_lines, merged):
+    diffs = []
+    for kind, start, end, left, right in merged:
+        level = 'CRITICAL' if kind == 'conflict' else 'WARNING'
+        parts = []
+        for name, hunks, lines in (('left', left, left_lines), ('right', right, right_lines)):
+            if not hunks:
+                continue
+            j1, j2 = hunks[0][2], hunks[-1][3]
+            text = _first_text(lines, j1, j2) or '(removed)'
+            parts.append(f"{name} {_span(j1, j2)}: {text}")
+        label = KIND_LABELS[kind]
+        base_text = _first_text(base_lines, start, end)
+        desc = f"{label} at base {_span(start, end)}" + (f" ('{base_text}')" if base_text else '') + '; ' + '; '.join(parts)
+        diffs.append({'location': f'Base Line {start + 1}', 'level': level, 'desc': desc, 'change': kind})
+    return diffs
+
+def three_way_lines(base_lines, left_lines, right_lines, budget=None):
+    """Three-way line compare; the base is interned once and diffed against each side."""
+    (keys_base, keys_left, keys_right), _ = intern_lines([base_lines, left_lines, right_lines])
+    time_left = None
+    if budget is not None and budget.deadline is not None:
+        time_left = max(budget.deadline - time.monotonic(), 0.001)
+    memory = budget.memory_budget if budget is not None else None
+    # Same knobs as the two-way pool (PARALLEL_WORKERS=1 disables it); the two sides run at once,
+    # so each gets half of the memory budget and must fit in it, and neither starts a pool of its own
+    workers = min(PARALLEL_WORKERS, os.cpu_count() or 1, 2)
+    share = memory // 2 if memory else None
+    fits = share is None or max(estimate_bytes(keys_base, keys_left), estimate_bytes(keys_base, keys_right)) <= share
+    if workers > 1 and fits and max(len(keys_base), len(keys_left), len(keys_right)) >= PARALLEL_MIN_LINES:
+        with process_pool(2) as pool:
+            fut_left = pool.submit(_opcodes_job, keys_base, keys_left, time_left, share, False)
+            fut_right = pool.submit(_opcodes_job, keys_base, keys_right, time_left, share, False)
+            (ops_left, reasons_left), (ops_right, reasons_right) = fut_left.result(), fut_right.result()
+    else:
+        ops_left, reasons_left = _opcodes_job(keys_base, keys_left, time_left, memory)
+        ops_right, reasons_right = _opcodes_job(keys_base, keys_right, time_left, memory)
+    if budget is not None:
+        for reason in reasons_left + reasons_right:
+            budget.degrade(reason)
+    merged = merge_hunks(_hunks(ops_left), _hunks(ops_right), keys_left, keys_right)
+    return _line_records(base_lines, left_lines, right_lines, merged)
+
+def flatten_json(value, path='', out=None):
+    """Flatten JSON to {path: leaf}, using the same path syntax as json_diff."""
+    if out is None:
+        out = {}
+    if isinstance(value, dict) and value:
+        for k, v in value.items():
+            flatten_json(v, f"{path}/{k}" if path else k, out)
+    elif isinstance(value, list) and value:
+        for i, v in enumerate(value):
+            flatten_json(v, f"{path}[{i}]" if path else f"[{i}]", out)
+    else:
+        out[path or 'root'] = value
+    return out
+
+def _same(a, b):
+    """Leaf equality that, like json_diff, treats a type change (true vs 1, 1 vs 1.0) as a change."""
+    return type(a) is type(b) and a == b
+
+def _show(value):
+    return 'missing' if value is _MISSING else json.dumps(value)
+
+def three_way_json(base, left, right, base_content, budget=None):
+    flat_base = flatten_json(base)
+    flat_left = flatten_json(left)
+    flat_right = flatten_json(right)
+    diffs = []
+    paths = list(flat_base)
+    paths += [p for p in flat_left if p not in flat_base]
+    paths += [p for p in flat_right if p not in flat_base and p not in flat_left]
+    for path in paths:
+        b = flat_base.get(path, _MISSING)
+        l = flat_left.get(path, _MISSING)
+        r = flat_right.get(path, _MISSING)
+        if _same(l, b) and _same(r, b):
+            continue
+        if _same(r, b):
+            kind = 'left'
+        elif _same(l, b):
+            kind = 'right'
+        elif _same(l, r):
+            kind = 'both'
+        else:
+            kind = 'conflict'
+        desc = f"{KIND_LABELS[kind]}: base {_show(b)}, left {_show(l)}, right {_show(r)}"
+        lineno = None
+        if b is not _MISSING and not (budget is not None and budget.expired()):
+            lineno = find_line_for_path(base_content, path)
+        diffs.append({'location': f'Base Line {lineno}' if lineno else path,
+                      'level': 'CRITICAL' if kind == 'conflict' else 'WARNING', 'desc': desc, 'change': kind})
+    return diffs
+
+def _read(data, input_mode):
+    if input_mode != 'path':
+        return data
+    with open(data, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def get_three_way_diff(base, left, right, input_mode='path', file_type=None, time_budget=None, memory_budget=None):
+    """
+    Three-way compare of two edited copies against their common base.
+    Returns: dict with 'identical', 'diffs' (each record also has 'change': 'left' | 'right' | 'both' | 'conflict'),
+    'conflicts' count, 'warnings', 'truncated'
+    """
+    warnings = []
+    try:
+        check_input_size(base, left, right, input_mode=input_mode)
+    except (InputTooLarge, OSError) as e:
+        return {'identical': False, 'diffs': [], 'warnings': [str(e)], 'error': str(e), 'truncated': False}
+    budget = Budget(time_budget, memory_budget)
+    try:
+        if input_mode == 'path' and not file_type:
+            ext = os.path.splitext(base)[1].lower()
+            file_type = ext[1:] if ext else 'text'
+        diffs = None
+        if file_type == 'docx' and input_mode == 'path':
+            texts = [load_input_lines(p, 'path', 'docx') for p in (base, left, right)]
+            diffs = three_way_lines(*texts, budget=budget)
+        else:
+            contents = [_read(x, input_mode) for x in (base, left, right)]
+            if file_type in (None, 'json') or input_mode != 'path':
+                try:
+                    parsed = [json.loads(c) for c in contents]
+                    diffs = three_way_json(*parsed, contents[0], budget=budget)
+                except ValueError:
+                    diffs = None
+            if diffs is None:
+                diffs = three_way_lines(*[c.splitlines(True) for c in contents], budget=budget)
+        diffs.sort(key=lambda d: extract_line_number(d['location']))
+        if budget.truncated:
+            warnings.extend(f"Result truncated: {r}" for r in budget.reasons)
+        return {'identical': not diffs, 'diffs': diffs, 'conflicts': sum(d['change'] == 'conflict' for d in diffs),
+                'warnings': warnings, 'truncated': budget.truncated}
+    except Exception as e:
+        return {'identical': False, 'diffs': [], 'warnings': [str(e)], 'error': str(e), 'truncated': budget.truncated}
@@ -0,0 +1,275 @@
+import difflib
+import hashlib
+import io
+import xml.etree.ElementTree as ET
+from collections import deque
+
+# How many top-level records each side may buffer while resynchronising after an insert/delete
+LOOKAHEAD = 64
+# Longest piece fed to the parser at once, so a document without newlines is still read in bounded chunks
+CHUNK_BYTES = 65536
+# Attributes that identify a record when its content changed
+ID_ATTRS = ('id', 'key', 'name')
+
+def _local(tag):
+    return tag.split('}', 1)[1] if isinstance(tag, str) and tag.startswith('{') else tag
+
+class _XmlStream:
+    """
+    Pull-parse one document (the same XMLPullParser that ET.iterparse uses), fed a line (at most
+    CHUNK_BYTES) at a time so every element gets its start line. Yields top-level records once they are complete and
+    hashed; each record must be released after use so memory stays bounded.
+    """
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.lines = {}
+        self.hashes = {}
+        self.root = None
+        self.counts = {}
+        self.positions = {}
+
+    def records(self):
+        parser = ET.XMLPullParser(events=('start', 'end'))
+        depth = 0
+        lineno = 1
+        for chunk in self.chunks:
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == 'start':
+                    depth += 1
+                    self.lines[id(elem)] = lineno
+                    if depth == 1:
+                        self.root = elem
+                    continue
+                depth -= 1
+                if depth == 1:
+                    self.hash(elem)
+                    tag = _local(elem.tag)
+                    self.counts[tag] = self.counts.get(tag, 0) + 1
+                    self.positions[id(elem)] = self.counts[tag]
+                    yield elem
+            if chunk.endswith(b'\n'):
+                lineno += 1
+        parser.close()
+
+    def hash(self, elem):
+        """Subtree hash (tag, sorted attributes, stripped text/tails); cached per element."""
+        digest = self.hashes.get(id(elem))
+        if digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            _feed(h, elem)
+            digest = self.hashes[id(elem)] = h.digest()
+        return digest
+
+    def line(self, elem):
+        return self.lines.get(id(elem), 0)
+
+    def release(self, elem):
+        """Drop a processed record from the tree and the bookkeeping tables."""
+        lines, hashes = self.lines, self.hashes
+        for node in elem.iter():
+            del lines[id(node)]
+            hashes.pop(id(node), None)
+        self.positions.pop(id(elem), None)
+        if self.root is not None and len(self.root) and self.root[0] is elem:
+            self.root.remove(elem)
+        elem.clear()
+
+def _feed(h, elem):
+    h.update(str(elem.tag).encode())
+    for k, v in sorted(elem.attrib.items()):
+        h.update(b'\0' + k.encode() + b'=' + v.encode())
+    h.update(b'\1' + (elem.text or '').strip().encode())
+    for child in elem:
+        _feed(h, child)
+        h.update(b'\2' + (child.tail or '').strip().encode())
+    h.update(b'\3')
+
+def _identity(elem):
+    for attr in ID_ATTRS:
+        if attr in elem.attrib:
+            return (elem.tag, attr, elem.attrib[attr])
+    return (elem.tag,)
+
+def _compare_attrs(e1, e2, path, loc, right_line, diffs):
+    a1, a2 = e1.attrib, e2.attrib
+    for k in a1:
+        if k not in a2:
+            diffs.append({'location': loc, 'level': 'CRITICAL', 'desc': f"{path}/@{_local(k)} missing in file2 (right line {right_line})"})
+        elif a1[k] != a2[k]:
+            diffs.append({'location': loc, 'level': 'CRITICAL', 'desc': f"{path}/@{_local(k)}: '{a1[k]}' vs '{a2[k]}' (right line {right_line})"})
+    for k in a2:
+        if k not in a1:
+            diffs.append({'location': loc, 'level': 'CRITICAL', 'desc': f"{path}/@{_local(k)} missing in file1 (right line {right_line})"})
+
+def _compare_text(t1, t2, what, loc, right_line, diffs):
+    t1 = t1 or ''
+    t2 = t2 or ''
+    if t1 == t2 or (not t1.strip() and not t2.strip()):
+        return
+    if t1.strip() == t2.strip():
+        diffs.append({'location': loc, 'level': 'WARNING', 'desc': f"{what}: whitespace difference (right line {right_line})"})
+    else:
+        diffs.append({'location': loc, 'level': 'CRITICAL', 'desc': f"{what}: '{t1.strip()}' vs '{t2.strip()}' (right line {right_line})"})
+
+def _child_paths(parent_path, children):
+    counts = {}
+    paths = []
+    for child in children:
+        tag = _local(child.tag)
+        counts[tag] = counts.get(tag, 0) + 1
+        paths.append(f"{parent_path}/{tag}[{counts[tag]}]")
+    return paths
+
+def _removed(side, elem, path, diffs):
+    diffs.append({'location': f'Left Line {side.line(elem)}', 'level': 'CRITICAL', 'desc': f"element {path} missing in file2"})
+
+def _added(side, elem, path, diffs):
+    diffs.append({'location': f'Right Line {side.line(elem)}', 'level': 'CRITICAL', 'desc': f"element {path} missing in file1"})
+
+def compare_elements(s1, s2, e1, e2, path1, path2, diffs):
+    """Compare two (possibly differing) subtrees already in memory; equal subtrees are skipped by hash."""
+    if s1.hash(e1) == s2.hash(e2):
+        return
+    loc = f'Left Line {s1.line(e1)}'
+    right_line = s2.line(e2)
+    _compare_attrs(e1, e2, path1, loc, right_line, diffs)
+    _compare_text(e1.text, e2.text, f"{path1}/text()", loc, right_line, diffs)
+    kids1, kids2 = list(e1), list(e2)
+    paths1, paths2 = _child_paths(path1, kids1), _child_paths(path2, kids2)
+    keys1 = [s1.hash(c) for c in kids1]
+    keys2 = [s2.hash(c) for c in kids2]
+    matcher = difflib.SequenceMatcher(None, keys1, keys2, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            for i, j in zip(range(i1, i2), range(j1, j2)):
+                _compare_text(kids1[i].tail, kids2[j].tail, f"{paths1[i]} tail text", f'Left Line {s1.line(kids1[i])}', s2.line(kids2[j]), diffs)
+            continue
+        # Pair changed children with the same identity (tag + id/key/name); the rest are added/removed
+        right = {}
+        for j in range(j1, j2):
+            right.setdefault(_identity(kids2[j]), []).append(j)
+        matched = set()
+        for i in range(i1, i2):
+            candidates = right.get(_identity(kids1[i]))
+            if candidates:
+                j = candidates.pop(0)
+                matched.add(j)
+                compare_elements(s1, s2, kids1[i], kids2[j], paths1[i], paths2[j], diffs)
+                _compare_text(kids1[i].tail, kids2[j].tail, f"{paths1[i]} tail text", f'Left Line {s1.line(kids1[i])}', s2.line(kids2[j]), diffs)
+            else:
+                _removed(s1, kids1[i], paths1[i], diffs)
+        for j in range(j1, j2):
+            if j not in matched:
+                _added(s2, kids2[j], paths2[j], diffs)
+
+def _find(buf, start, pred):
+    for k in range(start, len(buf)):
+        if pred(buf[k]):
+            return k
+    return None
+
+def compare_xml_streams(chunks1, chunks2, budget=None):
+    """
+    Structural XML compare in lockstep over top-level records.
+    Records with equal subtree hashes are skipped and released; on a mismatch both sides
+    look ahead up to LOOKAHEAD records to tell inserts/deletes from in-place changes.
+    Attribute order and indentation are not significant.
+    Raises ET.ParseError on malformed input.
+    """
+    s1, s2 = _XmlStream(chunks1), _XmlStream(chunks2)
+    it1, it2 = s1.records(), s2.records()
+    buf1, buf2 = deque(), deque()
+    diffs = []
+    started = False
+
+    def fill(it, buf, n):
+        while len(buf) < n:
+            elem = next(it, None)
+            if elem is None:
+                return
+            buf.append(elem)
+
+    def path_of(side, elem):
+        root_tag = _local(side.root.tag) if side.root is not None else ''
+        return f"/{root_tag}/{_local(elem.tag)}[{side.positions.get(id(elem), 1)}]"
+
+    while True:
+        if budget is not None and budget.expired():
+            budget.degrade("time budget exceeded during XML compare")
+            break
+        fill(it1, buf1, 1)
+        fill(it2, buf2, 1)
+        if not started and s1.root is not None and s2.root is not None:
+            started = True
+            root_path = f"/{_local(s1.root.tag)}"
+            if s1.root.tag != s2.root.tag:
+                diffs.append({'location': 'Line 1', 'level': 'CRITICAL', 'desc': f"root element differs: {root_path} vs /{_local(s2.root.tag)}"})
+            _compare_attrs(s1.root, s2.root, root_path, f'Left Line {s1.line(s1.root)}', s2.line(s2.root), diffs)
+        if not buf1 and not buf2:
+            break
+        if not buf2:
+            elem = buf1.popleft()
+            _removed(s1, elem, path_of(s1, elem), diffs)
+            s1.release(elem)
+            continue
+        if not buf1:
+            elem = buf2.popleft()
+            _added(s2, elem, path_of(s2, elem), diffs)
+            s2.release(elem)
+            continue
+        a, b = buf1[0], buf2[0]
+        ha, hb = s1.hashes[id(a)], s2.hashes[id(b)]
+        if ha == hb:
+            buf1.popleft()
+            buf2.popleft()
+            s1.release(a)
+            s2.release(b)
+            continue
+        fill(it1, buf1, LOOKAHEAD)
+        fill(it2, buf2, LOOKAHEAD)
+        ka = _find(buf2, 1, lambda e: s2.hashes[id(e)] == ha)
+        kb = _find(buf1, 1, lambda e: s1.hashes[id(e)] == hb)
+        if ka is None and kb is None and _identity(a) != _identity(b):
+            ka = _find(buf2, 1, lambda e: _identity(e) == _identity(a))
+            kb = _find(buf1, 1, lambda e: _identity(e) == _identity(b))
+        if ka is not None and (kb is None or ka <= kb):
+            for _ in range(ka):
+                elem = buf2.popleft()
+                _added(s2, elem, path_of(s2, elem), diffs)
+                s2.release(elem)
+            continue
+        if kb is not None:
+            for _ in range(kb):
+                elem = buf1.popleft()
+                _removed(s1, elem, path_of(s1, elem), diffs)
+                s1.release(elem)
+            continue
+        buf1.popleft()
+        buf2.popleft()
+        if a.tag == b.tag:
+            compare_elements(s1, s2, a, b, path_of(s1, a), path_of(s2, b), diffs)
+        else:
+            _removed(s1, a, path_of(s1, a), diffs)
+            _added(s2, b, path_of(s2, b), diffs)
+        s1.release(a)
+        s2.release(b)
+
+    if s1.root is not None and s2.root is not None and not (budget is not None and budget.truncated):
+        root_path = f"/{_local(s1.root.tag)}"
+        _compare_text(s1.root.text, s2.root.text, f"{root_path}/text()", f'Left Line {s1.line(s1.root)}', s2.line(s2.root), diffs)
+    return diffs
+
+def _chunks(f):
+    """Lines of a binary file, long lines split into pieces of at most CHUNK_BYTES."""
+    return iter(lambda: f.readline(CHUNK_BYTES), b'')
+
+def _file_chunks(path):
+    with open(path, 'rb') as f:
+        yield from _chunks(f)
+
+def compare_xml_files(path1, path2, budget=None):
+    return compare_xml_streams(_file_chunks(path1), _file_chunks(path2), budget)
+
+def compare_xml_text(text1, text2, budget=None):
+    return compare_xml_streams(_chunks(io.BytesIO(text1.encode('utf-8'))), _chunks(io.BytesIO(text2.encode('utf-8'))), budget)
@@ -1,17 +1,12 @@
 import json
 import ast
+import importlib.util
 import xml.etree.ElementTree as ET
 import re
-try:
-    import yaml
-    HAS_YAML = True
-except ImportError:
-    HAS_YAML = False
-try:
-    import pyflakes.api
-    HAS_PYFLAKES = True
-except ImportError:
-    HAS_PYFLAKES = False
+
+# Optional checkers are detected without importing them; they are imported on first use
+HAS_YAML = importlib.util.find_spec('yaml') is not None
+HAS_PYFLAKES = importlib.util.find_spec('pyflakes') is not None
 
 def parse_syntax(content: str, file_type: str):
     """
@@ -43,6 +38,7 @@ def parse_json(content: str):
 
 def parse_python(content: str):
     if HAS_PYFLAKES:
+        import pyflakes.api
         import pyflakes.reporter
 
         class CapturingReporter(pyflakes.reporter.Reporter):
@@ -133,6 +129,7 @@ def parse_javascript(content: str):
 def parse_yaml(content: str):
     if not HAS_YAML:
         return True, []  # Assume valid if no yaml lib
+    import yaml
     try:
         yaml.safe_load(content)
         return True, []
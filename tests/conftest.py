@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Make `src.compare_docs` importable when pytest is run from any directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -0,0 +1,9 @@
+from src.compare_docs import get_structured_diff
+
+def test_bumped_values_pair_line_by_line():
+    text1 = ''.join(f"setting_{i} = {i}\n" for i in range(10))
+    text2 = ''.join(f"setting_{i} = {i + 1}\n" for i in range(10))
+    result = get_structured_diff(text1, text2, 'content', 'txt')
+    locations = [d['location'] for d in result['diffs']]
+    assert locations == [f'Line {i + 1}' for i in range(10)]
+    assert not any('Extra content' in d['desc'] for d in result['diffs'])
@@ -0,0 +1,25 @@
+import difflib
+import random
+
+from src.compare_docs import budget
+
+def test_parallel_matching_gives_the_sequential_opcodes(monkeypatch):
+    rng = random.Random(7)
+    lines1 = [f"line {rng.randrange(300)}\n" for _ in range(2000)]
+    lines2 = list(lines1)
+    for _ in range(200):
+        k = rng.randrange(len(lines2))
+        lines2[k:k + rng.randrange(1, 4)] = [f"edit {rng.randrange(300)}\n"]
+    expected = difflib.SequenceMatcher(None, lines1, lines2).get_opcodes()
+
+    calls = []
+    parallel = budget._parallel_matching_blocks
+
+    def spy(*args):
+        calls.append(args)
+        return parallel(*args)
+    monkeypatch.setattr(budget, '_parallel_matching_blocks', spy)
+    monkeypatch.setattr(budget, 'PARALLEL_MIN_LINES', 100)
+    monkeypatch.setattr(budget.os, 'cpu_count', lambda: 4)
+    assert budget.budgeted_opcodes(lines1, lines2) == expected
+    assert calls
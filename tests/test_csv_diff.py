@@ -0,0 +1,43 @@
+from src.compare_docs import budget, get_structured_diff
+
+def compare(text1, text2, **kwargs):
+    return get_structured_diff(text1, text2, 'content', 'csv', **kwargs)
+
+def test_empty_file1_reports_every_row_added():
+    result = compare("", "id,a\n1,2\n3,4\n")
+    assert not result['identical']
+    descs = [d['desc'] for d in result['diffs']]
+    assert 'file1 is empty' in descs
+    assert descs.count('row added (id=1)') == 1
+    assert descs.count('row added (id=3)') == 1
+    assert all(d['level'] == 'CRITICAL' for d in result['diffs'])
+
+def test_empty_file2_reports_every_row_removed():
+    result = compare("id,a\n1,2\n", "")
+    descs = [d['desc'] for d in result['diffs']]
+    assert 'file2 is empty' in descs
+    assert 'row removed (id=1)' in descs
+
+def test_both_empty_is_identical():
+    assert compare("", "")['identical']
+
+def test_duplicate_key_in_file2_is_reported_as_duplicate():
+    result = compare("id,a\n1,2\n", "id,a\n1,2\n1,5\n")
+    descs = [d['desc'] for d in result['diffs']]
+    assert not any('row added' in d for d in descs)
+    assert '1 duplicate key(s) in file2; first occurrence used' in descs
+
+def test_utf8_bom_is_not_part_of_the_header():
+    result = compare("\ufeffid,a\n1,2\n", "id,a\n1,3\n")
+    assert 'error' not in result
+    assert [d['desc'] for d in result['diffs']] == ["row changed (id=1, left line 2): a: '2' vs '3'"]
+
+def test_csv_files_above_the_content_limit_are_streamed(tmp_path, monkeypatch):
+    monkeypatch.setattr(budget, 'MAX_INPUT_BYTES', 64)
+    path1, path2 = tmp_path / 'a.csv', tmp_path / 'b.csv'
+    path1.write_text('id,a\n' + ''.join(f'{i},{i}\n' for i in range(100)))
+    path2.write_text('id,a\n' + ''.join(f'{i},{i}\n' for i in range(101)))
+    result = get_structured_diff(str(path1), str(path2))
+    assert 'error' not in result
+    assert [d['desc'] for d in result['diffs']] == ['row added (id=100)']
+    assert 'error' in get_structured_diff(path1.read_text(), path2.read_text(), 'content', 'csv')
@@ -0,0 +1,8 @@
+from src.compare_docs import get_structured_diff
+
+def test_patterns_keep_their_own_flags_and_groups():
+    text1 = "ID ABC-1 ok\nvalue xx\n"
+    text2 = "ID abc-2 ok\nvalue yy\n"
+    result = get_structured_diff(text1, text2, 'content', 'txt', ignore_patterns=[r'(?i)abc-\d', r'(\w)\1'])
+    assert 'error' not in result
+    assert result['identical']
@@ -0,0 +1,24 @@
+from src.compare_docs.python_diff import compare_python_sources
+
+BODY = "    x = 1\n    return x + 1\n"
+
+def descs(text1, text2):
+    return [d['desc'] for d in compare_python_sources(text1, text2)]
+
+def test_rename_with_identical_body_is_reported_as_rename():
+    result = descs("def foo():\n" + BODY, "def baz():\n" + BODY)
+    assert len(result) == 1
+    assert "'foo' renamed to 'baz'" in result[0]
+
+def test_def_moved_into_class_is_reported_as_move():
+    left = "def foo(self):\n    return 1\n\nclass C:\n    pass\n"
+    right = "class C:\n    pass\n\n    def foo(self):\n        return 1\n"
+    result = descs(left, right)
+    assert any("'foo' moved to 'C.foo'" in d for d in result)
+    assert not any("renamed" in d for d in result)
+
+def test_renamed_class_members_move_with_it():
+    method = "    def m(self):\n        return 1\n"
+    result = descs("class Old:\n" + method, "class New:\n" + method)
+    assert len(result) == 1
+    assert "'Old' renamed to 'New'" in result[0]
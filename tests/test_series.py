@@ -0,0 +1,24 @@
+import io
+import os
+
+from fastapi import UploadFile
+
+from api.app import save_upload
+from src.compare_docs import get_series_diff
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+def upload(name):
+    with open(os.path.join(ROOT, name), 'rb') as f:
+        return UploadFile(io.BytesIO(f.read()), filename=name)
+
+def test_uploaded_docx_revisions_are_compared_as_docx():
+    paths = [save_upload(upload(name)) for name in ('version_1.docx', 'version_2.docx')]
+    try:
+        result = get_series_diff(paths, labels=['v1', 'v2'])
+    finally:
+        for path in paths:
+            os.unlink(path)
+    assert not result['steps'][0]['identical']
+    assert result['blame']
+    assert any(line['introduced_in'] == 'v2' for line in result['blame'])